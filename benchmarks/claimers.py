@@ -0,0 +1,38 @@
+"""Стоимость подготовки кошельков: создает N объектов Claimer по всем сетям
+и выводит время и память (tracemalloc). Сеть не нужна.
+
+Запуск из корня проекта: python -m benchmarks.claimers [N]
+"""
+import sys
+import time
+import tracemalloc
+
+from core.claimer import Claimer
+from data.config import CHAINS
+from eth_account import Account
+
+
+def main(count: int = 10000):
+    keys = [Account.create().key.hex() for _ in range(count)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    claimers = [
+        Claimer(chain=CHAINS[index % len(CHAINS)], key=key, proxies=[])
+        for index, key in enumerate(keys)
+    ]
+
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f'{len(claimers)} Claimer: {elapsed:.2f} сек., '
+        f'{elapsed / count * 10 ** 6:.0f} мкс на кошелек, память '
+        f'{current / 2 ** 20:.1f} MiB (пик {peak / 2 ** 20:.1f} MiB)'
+    )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,114 @@
+"""Пропускная способность планировщика кошельков: поднимает локальный
+JSON-RPC с задержкой ответа, направляет на него все сети и прогоняет
+N кошельков через process_wallet при разном MAX_CONCURRENT_WALLETS.
+Каждый кошелек делает чтения, как при скане и клейме, и ждет паузу.
+
+Запуск из корня проекта: python -m benchmarks.wallets [N] [задержка RPC]
+"""
+import asyncio
+import json
+import sys
+import time
+
+from aiohttp import web
+from core import process
+from core.claimer import Claimer
+from core.const import CHAINS_DATA
+from core.rpc import RPCProvider
+from data.config import CHAINS
+from eth_account import Account
+from loguru import logger
+
+CONCURRENCY = [1, 10, 50, 100]
+# пауза кошелька между шагами (сек.), вместо ACCOUNT_DELAY / CLAIM_DELAY
+WALLET_DELAY = 0.5
+
+RESULTS = {
+    'eth_chainId': hex(42161),
+    'eth_blockNumber': '0x1',
+    'eth_call': '0x' + '00' * 32,
+}
+
+
+async def start_rpc(latency: float) -> web.AppRunner:
+    async def handle(request: web.Request) -> web.Response:
+        body = await request.json()
+        await asyncio.sleep(latency)
+
+        def answer(item):
+            return {
+                'jsonrpc': '2.0',
+                'id': item['id'],
+                'result': RESULTS.get(item['method'], '0x0'),
+            }
+
+        if isinstance(body, list):
+            return web.Response(text=json.dumps([answer(i) for i in body]))
+
+        return web.Response(text=json.dumps(answer(body)))
+
+    app = web.Application()
+    app.router.add_post('/', handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 8545).start()
+
+    return runner
+
+
+async def run_wallet(wallet: str, key: str, **kwargs):
+    # скан $ZRO во всех сетях, проверка клейма, баланс, пауза
+    await Claimer.search_zro_balance_in_all_chains(wallet)
+    claimer = Claimer(chain=CHAINS[0], key=key, proxies=[])
+    await claimer.is_claimed()
+    await claimer.provider.eth.get_balance(wallet)
+    await asyncio.sleep(WALLET_DELAY)
+
+
+async def measure(keys, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+
+    await asyncio.gather(*[
+        process.process_wallet(
+            index=index,
+            total=len(keys),
+            key=key,
+            proxies=[],
+            db=None,
+            semaphore=semaphore,
+            account_delay=False,
+        )
+        for index, key in enumerate(keys, start=1)
+    ])
+
+    return len(keys) / (time.perf_counter() - start)
+
+
+async def main(count: int = 100, latency: float = 0.05):
+    logger.remove()
+
+    for data in CHAINS_DATA.values():
+        data['rpcs'] = ['http://127.0.0.1:8545/']
+    process.run_wallet = run_wallet
+
+    runner = await start_rpc(latency)
+    keys = [Account.create().key.hex() for _ in range(count)]
+
+    try:
+        for concurrency in CONCURRENCY:
+            rate = await measure(keys, concurrency)
+            print(
+                f'MAX_CONCURRENT_WALLETS={concurrency}: '
+                f'{rate:.1f} кошельков/сек.'
+            )
+    finally:
+        await RPCProvider.close_sessions()
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.05,
+    ))
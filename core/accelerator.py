@@ -0,0 +1,130 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from core.fees import FeeOracle
+from core.receipts import ReceiptWatcher
+from loguru import logger
+
+
+class Accelerator:
+    """Если транзакция не попала в блок за N блоков, переотправляет ее
+    с тем же nonce и поднятым газом (replace-by-fee), не выше потолка"""
+
+    def __init__(
+            self,
+            chain: str,
+            receipts: ReceiptWatcher,
+            fees: FeeOracle,
+            after_blocks: int = 10,
+            fee_bump: float = 1.2,
+            max_fee_wei: int = 0,
+    ):
+        self.chain = chain
+        self.receipts = receipts
+        self.fees = fees
+        self.after_blocks = after_blocks
+        # ноды принимают замену только при росте обеих цен минимум на 10%
+        self.fee_bump = max(fee_bump, 1.125)
+        self.max_fee_wei = max_fee_wei
+        self.replaced = 0
+
+    async def bump(self, contract_txn: Dict[str, Any]) -> Dict[str, Any]:
+        quote = await self.fees.quote()
+        tip = max(
+            int(contract_txn['maxPriorityFeePerGas'] * self.fee_bump),
+            quote['tip'],
+        )
+        max_fee = max(
+            int(contract_txn['maxFeePerGas'] * self.fee_bump),
+            quote['base_fee'] + tip,
+        )
+
+        return {
+            **contract_txn,
+            'maxPriorityFeePerGas': min(tip, max_fee),
+            'maxFeePerGas': max_fee,
+        }
+
+    async def wait(
+            self,
+            contract_txn: Dict[str, Any],
+            tx_hash: str,
+            replace: Callable[[Dict[str, Any]], Awaitable[str]],
+            timeout: float = 1200,
+    ) -> Tuple[Dict, str]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        first = asyncio.ensure_future(self.receipts.wait(tx_hash, timeout))
+        waits = {first: tx_hash}
+        is_capped = False
+        blocks = None
+
+        try:
+            while True:
+                if blocks is None and not is_capped:
+                    blocks = asyncio.ensure_future(
+                        self.receipts.wait_blocks(self.after_blocks)
+                    )
+
+                done, _ = await asyncio.wait(
+                    [*waits, blocks] if blocks else list(waits),
+                    timeout=max(0, deadline - loop.time()),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if not done:
+                    raise asyncio.TimeoutError
+
+                for task in done:
+                    if task not in waits:
+                        continue
+                    if task.exception() is None:
+                        return task.result(), waits[task]
+                    waits.pop(task)
+
+                if not waits:
+                    raise asyncio.TimeoutError
+
+                if blocks not in done:
+                    continue
+                blocks = None
+
+                bumped = await self.bump(contract_txn)
+                if bumped['gas'] * bumped['maxFeePerGas'] > self.max_fee_wei:
+                    is_capped = True
+                    logger.warning(
+                        f'{contract_txn["from"]} | Транзакция {tx_hash} '
+                        f'зависла, но поднимать газ выше потолка '
+                        f'ACCELERATE_MAX_FEE не буду'
+                    )
+                    continue
+
+                try:
+                    new_hash = await replace(bumped)
+                except Exception as e:
+                    # например, исходная уже в блоке и nonce занят
+                    logger.debug(
+                        f'{contract_txn["from"]} | Не удалось заменить '
+                        f'{tx_hash}: {e}'
+                    )
+                    continue
+
+                self.replaced += 1
+                contract_txn, tx_hash = bumped, new_hash
+                logger.warning(
+                    f'{contract_txn["from"]} | Транзакция не попала в блок '
+                    f'за {self.after_blocks} блоков, переотправил с газом '
+                    f'выше: {new_hash}'
+                )
+                waits[asyncio.ensure_future(self.receipts.wait(
+                    new_hash,
+                    max(0, deadline - loop.time())
+                ))] = new_hash
+
+        finally:
+            for task in [*waits, blocks]:
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'replaced': self.replaced}
@@ -1,74 +1,62 @@
-import uuid
-import random
-import aiohttp
+import asyncio
 from typing import List
 
-from fake_useragent import UserAgent
-from aiohttp import ClientTimeout
-from aiohttp_socks import ProxyConnector
-from better_proxy import Proxy
+from core.database import Database
+from core.fingerprint import make_baggage
+from core.proxy_pool import ProxyPool
+from data.config import (
+    PROOF_HEDGING,
+    PROOF_HEDGE_MAX,
+    PROOF_HEDGE_PERCENTILE,
+)
 from loguru import logger
 
 
 class Allocation:
-    def __init__(self, wallet: str, proxies: List[str]):
+    def __init__(
+            self,
+            wallet: str,
+            proxies: List[str],
+            db: Database = None,
+    ):
         self.wallet = wallet
         self.proxies = proxies
+        self.db = db or Database()
         self.api_url = (
             f'https://www.layerzero.foundation/'
             f'api/proof/{self.wallet}'
         )
 
     async def get_headers(self):
-        ua = UserAgent()
+        # User-Agent и остальной отпечаток добавляет прокси из пула
         return {
             "Content-Type": 'application/json',
-            "User-Agent": ua.random,
             "referer": self.api_url,
-            "baggage": (
-                f"sentry-environment=vercel-production,"
-                f"sentry-release=8db980a63760b2e079aa1e8cc36420b60474005a,"
-                f"sentry-public_key=7ea9fec73d6d676df2ec73f61f6d88f0,"
-                f"sentry-trace_id={uuid.uuid4()}"
-            )
+            "baggage": make_baggage(),
         }
 
     async def send_request(self, method: str, url: str):
         headers = await self.get_headers()
-        timeout = ClientTimeout(total=10)
-
-        if not self.proxies:
-            async with aiohttp.ClientSession(
-                    timeout=timeout
-            ) as session:
-                async with session.request(
-                        method,
-                        url,
-                        headers=headers
-                ) as response:
-                    return await response.json()
-
-        random.shuffle(self.proxies)
-
-        for proxy in self.proxies:
-            proxy = Proxy.from_str(proxy)
-            connector = ProxyConnector.from_url(proxy.as_url)
-
-            async with aiohttp.ClientSession(
-                    connector=connector,
-                    timeout=timeout
-            ) as session:
-                try:
-                    async with session.request(
-                            method,
-                            url,
-                            headers=headers
-                    ) as response:
-                        return await response.json()
-                except Exception:
-                    continue
-
-    async def get_allocation(self, response=None):
+
+        pool = ProxyPool.get(
+            self.proxies,
+            hedge=PROOF_HEDGING,
+            hedge_max=PROOF_HEDGE_MAX,
+            hedge_percentile=PROOF_HEDGE_PERCENTILE,
+        )
+
+        return await pool.request(
+            method,
+            url,
+            headers=headers
+        )
+
+    async def get_proof(self, response=None):
+        # пруф не меняется, поэтому в API ходим один раз на кошелек
+        cached = await self.db.get_proof(self.wallet)
+        if cached is not None:
+            return cached
+
         try:
             response = await self.send_request('GET', self.api_url)
         except Exception as e:
@@ -76,6 +64,40 @@ class Allocation:
                 f'{self.wallet} | Ошибка в запросе: {e}'
             )
 
+        if self.is_final(response):
+            await self.db.save_proof(self.wallet, response)
+
+        return response
+
+    @staticmethod
+    def is_final(response) -> bool:
+        if not isinstance(response, dict):
+            return False
+
+        if response.get('error') == 'Record not found':
+            return True
+
+        return bool(response.get('amount') and response.get('proof'))
+
+    @staticmethod
+    def has_claim(response) -> bool:
+        return (
+            isinstance(response, dict)
+            and bool(response.get('amount') and response.get('proof'))
+        )
+
+    async def get_allocation(self):
+        response = await self.get_proof()
+
+        return self.parse_allocation(response)
+
+    def parse_allocation(self, response):
+        if response is None:
+            logger.error(
+                f'{self.wallet} | Пустой ответ API с пруфами'
+            )
+            return None
+
         if response.get('error') == 'Record not found':
             zro_amount = 0
         else:
@@ -92,3 +114,32 @@ class Allocation:
             )
 
         return zro_amount
+
+
+async def prefetch_proofs(
+        wallets: List[str],
+        proxies: List[str],
+        db: Database,
+        concurrency: int = 20,
+):
+    cached = set(await db.get_wallets_with_proof())
+    wallets = [wallet for wallet in wallets if wallet not in cached]
+
+    if not wallets:
+        return
+
+    logger.info(f'Загружаю пруфы для {len(wallets)} кошельков...')
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(wallet: str):
+        async with semaphore:
+            return await Allocation(
+                wallet=wallet,
+                proxies=proxies,
+                db=db,
+            ).get_proof()
+
+    responses = await asyncio.gather(*[fetch(wallet) for wallet in wallets])
+    loaded = sum(1 for response in responses if Allocation.is_final(response))
+
+    logger.info(f'Пруфы загружены: {loaded}/{len(wallets)}')
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class ReadCache:
+    """LRU-кэш чтений: одинаковые запросы в одном блоке идут в RPC один раз"""
+
+    CACHED_METHODS = ['eth_call', 'eth_estimateGas', 'eth_getBalance']
+
+    def __init__(self, max_size: int = 10000, block_ttl: float = 1):
+        self.max_size = max_size
+        self.block_ttl = block_ttl
+        self.entries: OrderedDict = OrderedDict()
+        self.block_number = None
+        self.block_checked_at = 0.0
+        self.block_request = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(chain: str, block: int, method: str, params: Any) -> Hashable:
+        return chain, block, method, json.dumps(
+            params,
+            sort_keys=True,
+            default=str
+        )
+
+    async def get_block_number(
+            self,
+            make_request: Callable[..., Awaitable[Dict]],
+    ) -> int:
+        if time.monotonic() - self.block_checked_at < self.block_ttl:
+            return self.block_number
+
+        # один запрос номера блока на всех, кто пришел одновременно
+        if self.block_request is None:
+            self.block_request = asyncio.ensure_future(
+                make_request('eth_blockNumber', [])
+            )
+
+        request = self.block_request
+        try:
+            response = await request
+        finally:
+            if self.block_request is request:
+                self.block_request = None
+
+        if 'result' in response:
+            self.block_number = int(response['result'], 16)
+            self.block_checked_at = time.monotonic()
+
+        return self.block_number
+
+    async def get(
+            self,
+            key: Hashable,
+            request: Callable[[], Awaitable[Dict]],
+    ) -> Dict:
+        future = self.entries.get(key)
+
+        if future is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        future = asyncio.ensure_future(request())
+        self.entries[key] = future
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+        try:
+            response = await asyncio.shield(future)
+        except Exception:
+            self.entries.pop(key, None)
+            raise
+
+        if 'error' in response:
+            self.entries.pop(key, None)
+
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0,
+            'size': len(self.entries),
+        }
@@ -1,20 +1,33 @@
-import time
+import asyncio
 import traceback
 from typing import List
 
 import eth_abi
 from core.allocation import Allocation
-from core.const import CHAINS_DATA, TOKEN_CONTRACT
 from core.exceptions import NotEnoughtNative
-from core.utils import ABI, convert_to_bytes
+from core.quotes import (
+    TXN_FEE_WEI,
+    build_donate_call,
+    build_extra_bytes,
+    build_gas_cost_call,
+    build_send_fee_call,
+    claim_quotes,
+    decode_donate,
+)
+from core.registry import get_client
+from core.transfer import Transfer
+from core.utils import checksum_deposit_address, convert_to_bytes
 from core.w3 import Web3Manager
 from core.withdraw.okx_ import Okx
+from data.config import (
+    CLAIM_AND_TRANSFER,
+    CLAIM_TO_DEPOSIT,
+    CLAIM_TO_DEPOSIT_CHAINS,
+)
 from eth_abi.packed import encode_packed
 from hexbytes import HexBytes
 from loguru import logger
-from web3 import Web3
 from eth_abi import decode
-from web3.middleware import geth_poa_middleware
 
 
 class Claimer(Web3Manager):
@@ -22,53 +35,58 @@ class Claimer(Web3Manager):
             self,
             chain: str,
             key: str,
-            proxies: List[str]
+            proxies: List[str],
+            deposit_address: str = None,
     ):
         super().__init__(chain=chain, key=key)
-        self.arb_provider = Web3(Web3.HTTPProvider(
-            CHAINS_DATA.get('arbitrum').get('rpc')
-        ))
-        self.contract_address = CHAINS_DATA.get(
-            self.chain
-        ).get('contract_address')
-        self.arb_donate_address = CHAINS_DATA.get(
-            'arbitrum'
-        ).get('donate_address')
-        self.contract = self.provider.eth.contract(
-            address=self.contract_address,
-            abi=ABI.CLAIM,
-        )
+        # получатель $ZRO: сам кошелек или сразу депозитный адрес
+        self.receiver = self.wallet
+        if (
+                deposit_address
+                and CLAIM_TO_DEPOSIT
+                and self.chain in CLAIM_TO_DEPOSIT_CHAINS
+        ):
+            self.receiver = checksum_deposit_address(deposit_address)
+        arb_client = get_client('arbitrum')
+        self.arb_provider = arb_client.provider
+        self.arb_donate_address = arb_client.donate_address
+        self.contract_address = self.client.contract_address
+        self.contract = self.client.claim_contract
         self.proxies = proxies
-        self.proof_url = (
-            f'https://www.layerzero.foundation/'
-            f'api/proof/{self.wallet}'
-        )
 
     @staticmethod
     async def search_zro_balance_in_all_chains(wallet):
         chain_list = ['arbitrum', 'optimism', 'base']
 
         for chain in chain_list:
-            provider = Web3(Web3.HTTPProvider(
-                CHAINS_DATA.get(chain).get('rpc')
-            ))
-            provider.middleware_onion.inject(
-                geth_poa_middleware,
-                layer=0
-            )
-
-            token_contract = provider.eth.contract(
-                address=provider.to_checksum_address(TOKEN_CONTRACT),
-                abi=ABI.TOKEN,
-            )
-            balance = token_contract.functions.balanceOf(wallet).call()
+            token_contract = get_client(chain).token_contract
+            balance = await token_contract.functions.balanceOf(wallet).call()
 
             if balance > 0:
                 return chain, balance
 
         return None, 0
 
-    async def run(self, first_iter=True):
+    @property
+    def claims_to_deposit(self) -> bool:
+        return self.receiver != self.wallet
+
+    def make_transfer(self, deposit_address: str):
+        if (
+                self.chain != 'arbitrum'
+                or not CLAIM_AND_TRANSFER
+                or self.claims_to_deposit
+        ):
+            return None
+
+        return Transfer(
+            chain=self.chain,
+            key=self.key,
+            deposit_address=deposit_address,
+            proxies=self.proxies,
+        )
+
+    async def run(self, first_iter=True, transfer: Transfer = None):
         response = await self.get_proof()
 
         amount_wei = int(response.get('amount'))
@@ -78,71 +96,85 @@ class Claimer(Web3Manager):
             first_iter=first_iter,
         )
 
-        native_balance_wei = self.provider.eth.get_balance(self.wallet)
-        _, fee_wei = await self.get_extra_bytes(amount_wei=amount_wei)
-        txn_fee_wei = self.provider.to_wei(0.00004, 'ether')
-        all_needed_wei = int(donate_amount_wei + fee_wei + txn_fee_wei)
-
-        if native_balance_wei < all_needed_wei:
-            needed_amount_wei = all_needed_wei - native_balance_wei
-            needed_amount = self.provider.from_wei(needed_amount_wei, 'ether')
-            logger.warning(
-                f'{self.wallet} | Недостаточный баланc, '
-                f'не хватает: {round(needed_amount, 5)} $ETH'
-            )
-
-            is_withdraw = Okx.run(
-                token='ETH',
-                wallet=self.wallet,
-                chain=self.chain,
-                amount=needed_amount,
-            )
+        is_funded = await self.fund(
+            amount_wei=amount_wei,
+            donate_amount_wei=donate_amount_wei,
+            transfer=transfer,
+        )
 
-            if not is_withdraw:
-                return False
+        if not is_funded:
+            return False
 
         status = await self.claim(
             amount_wei=amount_wei,
             proof_addresses=proof_addresses,
-            donate_amount_wei=donate_amount_wei
+            donate_amount_wei=donate_amount_wei,
+            transfer=transfer,
         )
 
-        if status:
-            logger.info(
-                f'{self.wallet} | Ожидаем поступление $ZRO..'
-            )
-            zro_balance = 0
+        if (
+                status
+                and not self.claims_to_deposit
+                and not (transfer and transfer.status)
+        ):
+            await self.wait_zro_balance()
 
-            while zro_balance == 0:
-                zro_balance = await self.get_zro_balance()
-                time.sleep(30)
+        return status
 
-            logger.success(
-                f'{self.wallet} | {round(zro_balance / 10 ** 18, 2)} '
-                f'$ZRO найдены на кошельке'
-            )
+    async def fund(
+            self,
+            amount_wei: int,
+            donate_amount_wei: int,
+            transfer: Transfer = None,
+    ):
+        native_balance_wei, (_, fee_wei) = await asyncio.gather(
+            self.provider.eth.get_balance(self.wallet),
+            self.get_extra_bytes(amount_wei=amount_wei),
+        )
+        txn_fee_wei = TXN_FEE_WEI
+        if transfer is not None:
+            txn_fee_wei += await transfer.get_pipelined_fee()
+        all_needed_wei = int(donate_amount_wei + fee_wei + txn_fee_wei)
 
-        return status
+        if native_balance_wei >= all_needed_wei:
+            return True
 
-    async def get_zro_balance(self):
-        token_contract = self.provider.eth.contract(
-            address=self.provider.to_checksum_address(TOKEN_CONTRACT),
-            abi=ABI.TOKEN,
+        needed_amount_wei = all_needed_wei - native_balance_wei
+        needed_amount = self.provider.from_wei(needed_amount_wei, 'ether')
+        logger.warning(
+            f'{self.wallet} | Недостаточный баланc, '
+            f'не хватает: {round(needed_amount, 5)} $ETH'
         )
-        balance = token_contract.functions.balanceOf(self.wallet).call()
 
-        return balance
+        return await Okx.run(
+            token='ETH',
+            wallet=self.wallet,
+            chain=self.chain,
+            amount=needed_amount,
+        )
 
-    async def get_proof(self, response=None):
-        try:
-            request = Allocation(wallet=self.wallet, proxies=self.proxies)
-            response = await request.send_request('GET', self.proof_url)
-        except Exception as e:
-            logger.error(
-                f'{self.wallet} | Ошибка в запросе на получение proof: {e}'
-            )
+    async def wait_zro_balance(self, poll_interval: int = 30):
+        logger.info(
+            f'{self.wallet} | Ожидаем поступление $ZRO..'
+        )
+        zro_balance = 0
 
-        return response
+        while zro_balance == 0:
+            zro_balance = await self.get_zro_balance()
+            if zro_balance == 0:
+                await asyncio.sleep(poll_interval)
+
+        logger.success(
+            f'{self.wallet} | {round(zro_balance / 10 ** 18, 2)} '
+            f'$ZRO найдены на кошельке'
+        )
+
+        return zro_balance
+
+    async def get_proof(self):
+        request = Allocation(wallet=self.wallet, proxies=self.proxies)
+
+        return await request.get_proof()
 
     async def is_claimed(self):
         function_selector = '0x7a692982000000000000000000000000'
@@ -151,10 +183,8 @@ class Claimer(Web3Manager):
             [self.wallet]
         ).hex()
 
-        response = self.arb_provider.eth.call({
-            'to': self.arb_provider.to_checksum_address(
-                self.arb_donate_address
-            ),
+        response = await self.arb_provider.eth.call({
+            'to': self.arb_donate_address,
             'data': data
         })
 
@@ -173,32 +203,22 @@ class Claimer(Web3Manager):
             allocation,
             first_iter=True
     ):
-        function_selector = '0xd6d754db'
-        data = function_selector + encode_packed(
-            ["uint256"],
-            [allocation]
-        ).hex()
         if first_iter:
             logger.info(
                 f'{self.wallet} | Получаю сумму необходимого доната...'
             )
 
         try:
-            response = self.arb_provider.eth.call({
-                'to': self.arb_provider.to_checksum_address(
-                    self.arb_donate_address
-                ),
-                'data': data
-            })
-
-            decoded_data = decode(
-                ['uint256', 'uint256', 'uint256'],
-                bytes.fromhex(response.hex()[2:])
-            )
-
-            stable_amount_wei = decoded_data[0]
+            donate = claim_quotes.get_donate(allocation)
+            if donate is None:
+                response = await self.arb_provider.eth.call({
+                    'to': self.arb_donate_address,
+                    'data': build_donate_call(allocation)
+                })
+                donate = decode_donate(response)
+
+            stable_amount_wei, native_amount_wei = donate
             stable_amount = round(stable_amount_wei / 10 ** 6, 2)
-            native_amount_wei = decoded_data[2]
             native_amount = round(native_amount_wei / 10 ** 18, 5)
 
             if first_iter:
@@ -215,48 +235,62 @@ class Claimer(Web3Manager):
             )
             raise e
 
+    def build_claim_data(
+            self,
+            donate_amount_wei: int,
+            amount_wei: int,
+            proof_addresses: List[str],
+            extra_bytes,
+    ) -> str:
+        proof_bytes = [
+            convert_to_bytes(addr) for addr in
+            proof_addresses
+        ]
+
+        return self.contract.encodeABI(
+            fn_name='donateAndClaim',
+            args=[
+                2,
+                donate_amount_wei,
+                amount_wei,
+                proof_bytes,
+                self.receiver,
+                extra_bytes,
+            ]
+        )
+
     async def claim(
             self,
             donate_amount_wei: int,
             amount_wei: int,
-            proof_addresses: List[str]
+            proof_addresses: List[str],
+            transfer: Transfer = None,
     ):
         try:
             extra_bytes, l0_fee = await self.get_extra_bytes(
                 amount_wei=amount_wei
             )
 
-            proof_bytes = [
-                convert_to_bytes(addr) for addr in
-                proof_addresses
-            ]
-
-            data = self.contract.encodeABI(
-                fn_name='donateAndClaim',
-                args=[
-                    2,
-                    donate_amount_wei,
-                    amount_wei,
-                    proof_bytes,
-                    self.wallet,
-                    extra_bytes,
-                ]
+            data = self.build_claim_data(
+                donate_amount_wei=donate_amount_wei,
+                amount_wei=amount_wei,
+                proof_addresses=proof_addresses,
+                extra_bytes=extra_bytes,
             )
 
-            contract_txn = self.build_tx(
+            contract_txn = await self.build_tx(
                 value=int(donate_amount_wei + l0_fee),
                 data=data,
-                to_address=self.provider.to_checksum_address(
-                    self.contract_address
-                ),
+                to_address=self.contract_address,
             )
 
-            gas_price = self.provider.eth.gas_price
-            gas_estimate = self.provider.eth.estimate_gas(contract_txn)
+            gas_price, gas_estimate, native_balance_wei = await asyncio.gather(
+                self.get_gas_price(),
+                self.get_gas_limit(dict(contract_txn)),
+                self.provider.eth.get_balance(self.wallet),
+            )
             total_gas_cost_wei = gas_price * gas_estimate
 
-            native_balance_wei = self.provider.eth.get_balance(self.wallet)
-
             if native_balance_wei < total_gas_cost_wei:
                 needed_amount_wei = total_gas_cost_wei - native_balance_wei
                 logger.error(
@@ -265,11 +299,26 @@ class Claimer(Web3Manager):
                 )
                 raise NotEnoughtNative(needed_amount_wei)
 
-            status, hash_ = self.sign_message(
-                contract_txn=contract_txn
-            )
+            if transfer is not None:
+                status, hash_ = await self.claim_and_transfer(
+                    contract_txn=contract_txn,
+                    gas_limit=gas_estimate,
+                    amount_wei=amount_wei,
+                    transfer=transfer,
+                )
+            else:
+                status, hash_ = await self.sign_message(
+                    contract_txn=contract_txn,
+                    gas_limit=gas_estimate,
+                )
 
-            if status:
+            if status and self.claims_to_deposit:
+                logger.success(
+                    f'{self.wallet} | Успешно заклеймили $ZRO на '
+                    f'{self.receiver}\n'
+                    f'{self.explorer}/{hash_}'
+                )
+            elif status:
                 logger.success(
                     f'{self.wallet} | Успешно заклеймили $ZRO\n'
                     f'{self.explorer}/{hash_}'
@@ -285,6 +334,65 @@ class Claimer(Web3Manager):
             traceback.print_exc()
             logger.error(f'{self.wallet} | Ошибка при клейме: {e}')
 
+    async def claim_and_transfer(
+            self,
+            contract_txn,
+            gas_limit: int,
+            amount_wei: int,
+            transfer: Transfer,
+    ):
+        try:
+            claim_hash = await self.send_transaction(
+                contract_txn=contract_txn,
+                gas_limit=gas_limit,
+            )
+        except Exception as e:
+            logger.error(f'Ошибка при подписи транзакции: {e}')
+            return False, None
+
+        try:
+            transfer_hash, transfer_txn = await transfer.send_pipelined(
+                amount_wei
+            )
+        except Exception as e:
+            logger.error(
+                f'{self.wallet} | Не удалось отправить трансфер '
+                f'вслед за клеймом: {e}'
+            )
+            transfer_hash = None
+
+        logger.info(f'{self.wallet} | Отправил клейм и трансфер, '
+                    f'жду включения в блок...')
+
+        checks = [self.wait_transaction(
+            tx_hash=claim_hash,
+            contract_txn=contract_txn,
+        )]
+        if transfer_hash:
+            checks.append(transfer.wait_transaction(
+                tx_hash=transfer_hash,
+                contract_txn=transfer_txn,
+            ))
+        results = await asyncio.gather(*checks, return_exceptions=True)
+        results = [
+            (False, None) if isinstance(result, Exception) else result
+            for result in results
+        ]
+
+        status, claim_hash = results[0]
+        if len(results) == 2:
+            transfer.status, transfer_hash = results[1]
+
+        if transfer.status:
+            logger.success(
+                f'{self.wallet} | Успешно перевели '
+                f'{round(amount_wei / 10 ** 18, 2)} $ZRO на '
+                f'{transfer.deposit_address}\n'
+                f'{self.explorer}/{transfer_hash}'
+            )
+
+        return status, claim_hash
+
     async def get_extra_bytes(
             self,
             amount_wei=0,
@@ -292,26 +400,21 @@ class Claimer(Web3Manager):
             l0_fee=0
     ):
         if self.chain not in ['arbitrum']:
-            function_selector = '0x73760a89'
-            data = function_selector + encode_packed(
-                ['uint256', 'uint256'],
-                [CHAINS_DATA.get(
-                    self.chain
-                ).get('chain_0id'),
-                 int(amount_wei)]
-            ).hex()
-
-            response = self.arb_provider.eth.call({
-                'to': self.arb_provider.to_checksum_address(
-                    self.arb_donate_address
-                ),
-                'data': data
+            cached = claim_quotes.get_extra_bytes(
+                self.chain,
+                self.receiver,
+                amount_wei
+            )
+            if cached is not None:
+                return cached
+
+            response = await self.arb_provider.eth.call({
+                'to': self.arb_donate_address,
+                'data': build_gas_cost_call(self.chain, amount_wei)
             })
 
             gas_cost = int(eth_abi.decode(['uint256'], response)[0])
-            adjusted_gas_cost_hex = hex(gas_cost)[2:].zfill(64)
-
-            extra_bytes = f'000301002101{adjusted_gas_cost_hex}'
+            extra_bytes = build_extra_bytes(gas_cost)
 
             l0_fee = await self.get_send_fee(
                 amount_wei=amount_wei,
@@ -322,30 +425,13 @@ class Claimer(Web3Manager):
         return HexBytes(extra_bytes), l0_fee
 
     async def get_send_fee(self, amount_wei, extra_bytes):
-        data = '0x9baa23e6' + encode_packed(
-            [
-                'bytes12',
-                'address',
-                'uint256',
-                'bytes32',
-                'bytes32',
-                'bytes',
-                'bytes26'
-            ],
-            [
-                b'\x00' * 12,
-                self.wallet,
-                int(amount_wei),
-                b'\x00' * 31 + b'\x60',
-                b'\x00' * 31 + b'\x26',
-                HexBytes(extra_bytes),
-                b'\x00' * 26
-            ]
-        ).hex()
-
-        response = self.provider.eth.call({
-            'to': self.contract.functions.claimContract().call(),
-            'data': data
+        response = await self.provider.eth.call({
+            'to': await self.client.get_claim_target(),
+            'data': build_send_fee_call(
+                self.receiver,
+                amount_wei,
+                extra_bytes
+            )
         })
 
         fee = int(eth_abi.decode(['uint256'], response)[0])
@@ -3,21 +3,35 @@ CHAINS_DATA = {
         'chain_0id': 30110,
         'donate_address': '0xd6b6a6701303b5ea36fa0edf7389b562d8f894db',
         'contract_address': '0xB09F16F625B363875e39ADa56C03682088471523',
-        'rpc': 'https://arbitrum.blockpi.network/v1/rpc/ac4d242e7edf4a7f4759e535bbba6040eb03589b',
+        'rpcs': [
+            'https://arbitrum.blockpi.network/v1/rpc/ac4d242e7edf4a7f4759e535bbba6040eb03589b',
+            'https://arb1.arbitrum.io/rpc',
+            'https://arbitrum.llamarpc.com',
+        ],
         'explorer': 'https://arbiscan.io/tx',
     },
     'base': {
         'chain_0id': 30184,
         'contract_address': '0xf19ccb20726Eab44754A59eFC4Ad331e3bF4F248',
-        'rpc': 'https://base.blockpi.network/v1/rpc/ac6a4e37575329b25047d029d15eea7ae7115f13',
+        'rpcs': [
+            'https://base.blockpi.network/v1/rpc/ac6a4e37575329b25047d029d15eea7ae7115f13',
+            'https://mainnet.base.org',
+            'https://base.llamarpc.com',
+        ],
         'explorer': 'https://basescan.org/tx',
     },
     'optimism': {
         'chain_0id': 30111,
         'contract_address': '0x3Ef4abDb646976c096DF532377EFdfE0E6391ac3',
-        'rpc': 'https://optimism.blockpi.network/v1/rpc/b96158ded2470cedf5156af1cc7e08fa9e251f4e',
+        'rpcs': [
+            'https://optimism.blockpi.network/v1/rpc/b96158ded2470cedf5156af1cc7e08fa9e251f4e',
+            'https://mainnet.optimism.io',
+            'https://optimism.llamarpc.com',
+        ],
         'explorer': 'https://optimistic.etherscan.io/tx',
     },
 }
 
 TOKEN_CONTRACT = '0x6985884c4392d348587b19cb9eaaf157f13271cd'
+
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
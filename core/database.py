@@ -1,3 +1,5 @@
+import json
+
 import aiosqlite
 from core.enums import ClaimStatus
 
@@ -17,6 +19,56 @@ class Database:
                     claim_status TEXT
                 )
             """)
+            # адрес, на который заклеймлены $ZRO, если не сам кошелек
+            async with db.execute("PRAGMA table_info(claims)") as cursor:
+                columns = [row[1] for row in await cursor.fetchall()]
+            if 'claimed_to' not in columns:
+                await db.execute(
+                    "ALTER TABLE claims ADD COLUMN claimed_to TEXT"
+                )
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS scan_results (
+                    wallet_address TEXT PRIMARY KEY,
+                    zro_chain TEXT,
+                    zro_balance TEXT,
+                    is_claimed BOOLEAN
+                )
+            """)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS proofs (
+                    wallet_address TEXT PRIMARY KEY,
+                    response TEXT
+                )
+            """)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS transactions (
+                    chain TEXT,
+                    wallet_address TEXT,
+                    nonce INTEGER,
+                    tx_hash TEXT,
+                    status TEXT,
+                    PRIMARY KEY (chain, wallet_address, nonce)
+                )
+            """)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS gas_limits (
+                    chain TEXT,
+                    contract TEXT,
+                    selector TEXT,
+                    gas_limit INTEGER,
+                    PRIMARY KEY (chain, contract, selector)
+                )
+            """)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS fee_history (
+                    chain TEXT,
+                    time INTEGER,
+                    block INTEGER,
+                    base_fee TEXT,
+                    tip TEXT,
+                    gas_price TEXT
+                )
+            """)
             await db.commit()
 
     async def add_wallet(
@@ -68,6 +120,17 @@ class Database:
                 """, (claim_status.value, wallet_address))
             await db.commit()
 
+    async def set_claimed_to(
+            self,
+            wallet_address,
+            claimed_to
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            await db.execute("""
+                UPDATE claims SET claimed_to = ? WHERE wallet_address = ?
+            """, (claimed_to, wallet_address))
+            await db.commit()
+
     async def get_wallets_by_status(
             self,
             claim_status
@@ -92,4 +155,209 @@ class Database:
                 SELECT deposit_address FROM claims WHERE wallet_address = ?
             """, (wallet_address,)) as cursor:
                 result = await cursor.fetchone()
-                return result[0] if result else None
\ No newline at end of file
+                return result[0] if result else None
+
+    async def delete_scan_results(
+            self,
+            wallets
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            await db.executemany("""
+                DELETE FROM scan_results WHERE wallet_address = ?
+            """, [(wallet,) for wallet in wallets])
+            await db.commit()
+
+    async def save_scan_results(
+            self,
+            rows
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            await db.executemany("""
+                INSERT OR REPLACE INTO scan_results (
+                wallet_address,
+                zro_chain,
+                zro_balance,
+                is_claimed
+                )
+                VALUES (?, ?, ?, ?)
+            """, [
+                (wallet, chain, str(balance), is_claimed)
+                for wallet, chain, balance, is_claimed in rows
+            ])
+            await db.commit()
+
+    async def get_scan_result(
+            self,
+            wallet_address
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            async with db.execute("""
+                SELECT zro_chain, zro_balance, is_claimed
+                FROM scan_results WHERE wallet_address = ?
+            """, (wallet_address,)) as cursor:
+                result = await cursor.fetchone()
+
+        if not result:
+            return None
+
+        zro_chain, zro_balance, is_claimed = result
+        return zro_chain, int(zro_balance), bool(is_claimed)
+
+    async def save_proof(
+            self,
+            wallet_address,
+            response
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            await db.execute("""
+                INSERT OR REPLACE INTO proofs (wallet_address, response)
+                VALUES (?, ?)
+            """, (wallet_address, json.dumps(response)))
+            await db.commit()
+
+    async def get_proof(
+            self,
+            wallet_address
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            async with db.execute("""
+                SELECT response FROM proofs WHERE wallet_address = ?
+            """, (wallet_address,)) as cursor:
+                result = await cursor.fetchone()
+                return json.loads(result[0]) if result else None
+
+    async def get_wallets_with_proof(self):
+        async with aiosqlite.connect(self.db_name) as db:
+            async with db.execute(
+                "SELECT wallet_address FROM proofs"
+            ) as cursor:
+                return [row[0] for row in await cursor.fetchall()]
+
+    async def save_transaction(
+            self,
+            chain,
+            wallet_address,
+            nonce,
+            tx_hash,
+            status='sent'
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            await db.execute("""
+                INSERT OR REPLACE INTO transactions (
+                chain,
+                wallet_address,
+                nonce,
+                tx_hash,
+                status
+                )
+                VALUES (?, ?, ?, ?, ?)
+            """, (chain, wallet_address, nonce, tx_hash, status))
+            await db.commit()
+
+    async def update_transaction_status(
+            self,
+            tx_hash,
+            status
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            await db.execute("""
+                UPDATE transactions SET status = ? WHERE tx_hash = ?
+            """, (status, tx_hash))
+            await db.commit()
+
+    async def get_transactions(
+            self,
+            chain,
+            wallet_address,
+            min_nonce=0
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            async with db.execute("""
+                SELECT nonce, tx_hash, status FROM transactions
+                WHERE chain = ? AND wallet_address = ? AND nonce >= ?
+                ORDER BY nonce
+            """, (chain, wallet_address, min_nonce)) as cursor:
+                return await cursor.fetchall()
+
+    async def get_sent_chains(
+            self,
+            wallet_address
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            async with db.execute("""
+                SELECT DISTINCT chain FROM transactions
+                WHERE wallet_address = ? AND status = 'sent'
+            """, (wallet_address,)) as cursor:
+                return [row[0] for row in await cursor.fetchall()]
+
+    async def save_fee_history(
+            self,
+            chain,
+            rows
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            await db.executemany("""
+                INSERT INTO fee_history (
+                chain,
+                time,
+                block,
+                base_fee,
+                tip,
+                gas_price
+                )
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [
+                (
+                    chain,
+                    row['time'],
+                    row['block'],
+                    str(row['base_fee']),
+                    str(row['tip']),
+                    str(row['gas_price']),
+                )
+                for row in rows
+            ])
+            await db.commit()
+
+    async def get_gas_limits(
+            self,
+            chain
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            async with db.execute("""
+                SELECT contract, selector, gas_limit FROM gas_limits
+                WHERE chain = ?
+            """, (chain,)) as cursor:
+                return await cursor.fetchall()
+
+    async def save_gas_limit(
+            self,
+            chain,
+            contract,
+            selector,
+            gas_limit
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            await db.execute("""
+                INSERT OR REPLACE INTO gas_limits (
+                chain,
+                contract,
+                selector,
+                gas_limit
+                )
+                VALUES (?, ?, ?, ?)
+            """, (chain, contract, selector, gas_limit))
+            await db.commit()
+
+    async def delete_gas_limit(
+            self,
+            chain,
+            contract,
+            selector
+    ):
+        async with aiosqlite.connect(self.db_name) as db:
+            await db.execute("""
+                DELETE FROM gas_limits
+                WHERE chain = ? AND contract = ? AND selector = ?
+            """, (chain, contract, selector))
+            await db.commit()
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from collections import deque
+from statistics import median
+from typing import Any, Awaitable, Callable, Dict, List
+
+from loguru import logger
+
+
+class FeeOracle:
+    """Одна котировка газа на сеть: обновляется раз в блок, общая для всех
+    кошельков, история котировок пишется в базу раз в flush_every блоков"""
+
+    def __init__(
+            self,
+            chain: str,
+            make_request: Callable[..., Awaitable[Dict]],
+            get_block_number: Callable[[], Awaitable[int]],
+            history_size: int = 10000,
+            db=None,
+            flush_every: int = 50,
+    ):
+        self.chain = chain
+        self.make_request = make_request
+        self.get_block_number = get_block_number
+        self.quote_block = None
+        self.quote_data = None
+        self.quote_request = None
+        self.history = deque(maxlen=history_size)
+        self.db = db
+        self.flush_every = flush_every
+        # котировки, которых еще нет в базе
+        self.unsaved: List[Dict[str, int]] = []
+        self.flush_task = None
+        self.requests = 0
+        self.refreshes = 0
+
+    async def request(self, method: str, params) -> Any:
+        response = await self.make_request(method, params)
+
+        if 'error' in response:
+            raise ValueError(f'{method}: {response["error"]}')
+
+        return response['result']
+
+    async def fetch(self) -> Dict[str, int]:
+        # три запроса уходят одним batch через RPCBatch
+        block, tip, gas_price = await asyncio.gather(
+            self.request('eth_getBlockByNumber', ['pending', False]),
+            self.request('eth_maxPriorityFeePerGas', []),
+            self.request('eth_gasPrice', []),
+        )
+
+        quote = {
+            'block': int(block['number'], 16) if block.get('number')
+            else None,
+            'base_fee': int(block['baseFeePerGas'], 16),
+            'tip': int(tip, 16),
+            'gas_price': int(gas_price, 16),
+        }
+        self.refreshes += 1
+        row = {'time': int(time.time()), **quote}
+        self.history.append(row)
+        self.unsaved.append(row)
+
+        # запись идет в фоне, чтобы не задерживать котировку
+        if (
+                len(self.unsaved) >= self.flush_every
+                and (self.flush_task is None or self.flush_task.done())
+        ):
+            self.flush_task = asyncio.ensure_future(self.flush())
+
+        return quote
+
+    async def quote(self) -> Dict[str, int]:
+        self.requests += 1
+        block = await self.get_block_number()
+
+        if (
+                self.quote_data is not None
+                and block is not None
+                and block == self.quote_block
+        ):
+            return self.quote_data
+
+        # один запрос котировки на всех, кто пришел одновременно
+        if self.quote_request is None:
+            self.quote_request = asyncio.ensure_future(self.fetch())
+
+        request = self.quote_request
+        try:
+            self.quote_data = await asyncio.shield(request)
+            self.quote_block = block
+        finally:
+            if self.quote_request is request:
+                self.quote_request = None
+
+        return self.quote_data
+
+    async def flush(self):
+        # при завершении дожидаемся фоновой записи
+        task = self.flush_task
+        if (
+                task is not None
+                and not task.done()
+                and task is not asyncio.current_task()
+        ):
+            await task
+
+        if self.db is None or not self.unsaved:
+            return
+
+        rows, self.unsaved = self.unsaved, []
+        try:
+            await self.db.save_fee_history(self.chain, rows)
+        except Exception as e:
+            self.unsaved = rows + self.unsaved
+            logger.warning(
+                f'{self.chain.upper()} | Не удалось сохранить '
+                f'историю газа: {e}'
+            )
+
+    def get_history(self) -> List[Dict[str, int]]:
+        return list(self.history)
+
+    def stats(self) -> Dict[str, Any]:
+        base_fees = [quote['base_fee'] for quote in self.history]
+
+        return {
+            'requests': self.requests,
+            'refreshes': self.refreshes,
+            'base_fee_min': min(base_fees) if base_fees else None,
+            'base_fee_median': int(median(base_fees)) if base_fees else None,
+            'base_fee_max': max(base_fees) if base_fees else None,
+        }
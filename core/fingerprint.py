@@ -0,0 +1,92 @@
+import random
+import re
+import uuid
+from itertools import cycle
+from typing import Dict, List
+
+from fake_useragent import UserAgent
+
+SENTRY_BAGGAGE = (
+    'sentry-environment=vercel-production,'
+    'sentry-release=8db980a63760b2e079aa1e8cc36420b60474005a,'
+    'sentry-public_key=7ea9fec73d6d676df2ec73f61f6d88f0,'
+    'sentry-trace_id='
+)
+
+PLATFORMS = [
+    ('Windows', 'Windows'),
+    ('Android', 'Android'),
+    ('iPhone', 'iOS'),
+    ('Mac OS X', 'macOS'),
+    ('CrOS', 'Chrome OS'),
+    ('Linux', 'Linux'),
+]
+
+
+class Fingerprints:
+    """Пул готовых наборов заголовков: датасет UA грузится один раз"""
+
+    def __init__(self, size: int = 50):
+        self.size = size
+        self.pool: List[Dict[str, str]] = []
+        self.next_fingerprint = None
+
+    def load(self):
+        ua = UserAgent()
+        user_agents = {ua.random for _ in range(self.size * 3)}
+
+        self.pool = [
+            self.build(user_agent)
+            for user_agent in random.sample(
+                sorted(user_agents),
+                min(self.size, len(user_agents))
+            )
+        ]
+        random.shuffle(self.pool)
+        self.next_fingerprint = cycle(self.pool)
+
+    @staticmethod
+    def build(user_agent: str) -> Dict[str, str]:
+        headers = {
+            'User-Agent': user_agent,
+            'Accept': 'application/json, text/plain, */*',
+            'Accept-Language': 'en-US,en;q=0.9',
+        }
+
+        # client hints отдают только браузеры на Chromium
+        chrome = re.search(r'Chrome/(\d+)', user_agent)
+        if chrome and 'Firefox' not in user_agent:
+            version = chrome.group(1)
+            brand = 'Microsoft Edge' if 'Edg/' in user_agent \
+                else 'Google Chrome'
+            platform = next(
+                (name for key, name in PLATFORMS if key in user_agent),
+                'Windows'
+            )
+            headers.update({
+                'sec-ch-ua': (
+                    f'"Chromium";v="{version}", "{brand}";v="{version}", '
+                    f'"Not?A_Brand";v="99"'
+                ),
+                'sec-ch-ua-mobile': '?1' if 'Mobile' in user_agent else '?0',
+                'sec-ch-ua-platform': f'"{platform}"',
+            })
+
+        return headers
+
+    def get(self) -> Dict[str, str]:
+        if not self.pool:
+            self.load()
+
+        return next(self.next_fingerprint)
+
+
+fingerprints = Fingerprints()
+
+
+def get_fingerprint() -> Dict[str, str]:
+    return fingerprints.get()
+
+
+def make_baggage() -> str:
+    return f'{SENTRY_BAGGAGE}{uuid.uuid4()}'
@@ -0,0 +1,309 @@
+import asyncio
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import ccxt
+from core.const import MULTICALL3_ADDRESS
+from core.planner import planner
+from core.quotes import ClaimQuotes, claim_quotes
+from core.w3 import Web3Manager
+from core.withdraw.okx_ import Okx
+from data.config import (
+    FUNDING_BATCH_SIZE,
+    FUNDING_HOT_WALLET_KEY,
+    FUNDING_MARGIN,
+    FUNDING_MODE,
+    FUNDING_TIMEOUT,
+)
+from eth_abi import encode
+from loguru import logger
+
+
+class FundingPlan:
+    """Пополняет все кошельки до старта клейма: пачками с горячего кошелька
+    через Multicall3 или параллельными выводами с OKX"""
+
+    MODES = ['okx', 'disperse']
+    AGGREGATE3_VALUE_SELECTOR = '0x174dea71'
+    GAS_BOOST = 1.5
+
+    def __init__(
+            self,
+            quotes: ClaimQuotes,
+            mode: Optional[str] = None,
+            hot_key: str = '',
+            margin: float = 1.1,
+            batch_size: int = 100,
+            timeout: float = 1800,
+            poll_interval: float = 15,
+    ):
+        if mode is not None and mode not in self.MODES:
+            raise ValueError(
+                f'Неизвестный способ пополнения: {mode}, '
+                f'доступные: {self.MODES}'
+            )
+
+        if mode == 'disperse' and not hot_key:
+            raise ValueError(
+                'Для пополнения с горячего кошелька укажите '
+                'FUNDING_HOT_WALLET_KEY'
+            )
+
+        self.quotes = quotes
+        self.mode = mode
+        self.hot_key = hot_key
+        self.margin = margin
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def plan(self) -> Dict[str, Dict[str, int]]:
+        # сеть -> кошелек -> сколько $ETH довести
+        shortfalls: Dict[str, Dict[str, int]] = {}
+
+        for wallet, needs in self.quotes.needs.items():
+            balances = self.quotes.balances.get(wallet, {})
+            options = [
+                (max(0, need - balances[chain]), need, chain)
+                for chain, need in needs.items()
+                if chain in balances
+            ]
+            if not options:
+                continue
+
+            shortfall, _, chain = min(options)
+            planner.pin(wallet, chain)
+
+            if shortfall:
+                shortfalls.setdefault(chain, {})[wallet] = int(
+                    shortfall * self.margin
+                )
+
+        return shortfalls
+
+    @classmethod
+    def build_disperse_data(cls, amounts: List[Tuple[str, int]]) -> str:
+        # перевод $ETH на EOA - вызов с пустыми данными
+        return cls.AGGREGATE3_VALUE_SELECTOR + encode(
+            ['(address,bool,uint256,bytes)[]'],
+            [[(wallet, False, value, b'') for wallet, value in amounts]]
+        ).hex()
+
+    async def disperse(
+            self,
+            chain: str,
+            amounts: Dict[str, int],
+    ) -> List[str]:
+        sender = Web3Manager(chain=chain, key=self.hot_key)
+        items = list(amounts.items())
+        batches = [
+            items[i:i + self.batch_size]
+            for i in range(0, len(items), self.batch_size)
+        ]
+
+        async def prepare(
+                batch: List[Tuple[str, int]],
+        ) -> Tuple[Dict[str, Any], int]:
+            contract_txn = await sender.build_tx(
+                value=sum(value for _, value in batch),
+                data=self.build_disperse_data(batch),
+                to_address=MULTICALL3_ADDRESS,
+            )
+            gas_limit, _ = await asyncio.gather(
+                sender.get_gas_limit(dict(contract_txn)),
+                sender.add_price(chain=chain, contract_txn=contract_txn),
+            )
+
+            return contract_txn, gas_limit
+
+        prepared = await asyncio.gather(
+            *[prepare(batch) for batch in batches],
+            return_exceptions=True,
+        )
+
+        ready = []
+        for batch, result in zip(batches, prepared):
+            if isinstance(result, Exception):
+                self.log_fallback(chain, batch, result)
+            else:
+                ready.append((batch, *result))
+
+        if not ready:
+            return []
+
+        # на горячем кошельке должно хватить и на суммы, и на газ всех пачек
+        total = sum(
+            contract_txn['value']
+            + int(gas_limit * self.GAS_BOOST) * contract_txn['maxFeePerGas']
+            for _, contract_txn, gas_limit in ready
+        )
+        balance = await sender.provider.eth.get_balance(sender.wallet)
+
+        if balance < total:
+            logger.error(
+                f'{sender.wallet} | На горячем кошельке в сети '
+                f'{chain.upper()} {round(balance / 10 ** 18, 6)} $ETH, '
+                f'нужно {round(total / 10 ** 18, 6)} с учетом газа: '
+                f'кошельки будут пополнены по одному'
+            )
+            return []
+
+        async def send(
+                batch: List[Tuple[str, int]],
+                contract_txn: Dict[str, Any],
+                gas_limit: int,
+        ) -> List[str]:
+            status, tx_hash = await sender.sign_message(
+                contract_txn,
+                gas_boost=self.GAS_BOOST,
+                gas_limit=gas_limit,
+            )
+
+            if status:
+                logger.success(
+                    f'{sender.wallet} | Разослал $ETH на {len(batch)} '
+                    f'кошельков в сети {chain.upper()}: {tx_hash}'
+                )
+                return [wallet for wallet, _ in batch]
+
+            self.log_fallback(
+                chain,
+                batch,
+                f'транзакция {tx_hash} не прошла' if tx_hash
+                else 'транзакция не отправлена',
+            )
+            return []
+
+        # nonce выдается локально, поэтому пачки уходят без ожидания
+        results = await asyncio.gather(*[send(*item) for item in ready])
+
+        return [wallet for result in results for wallet in result]
+
+    @staticmethod
+    def log_fallback(chain: str, batch: List[Tuple[str, int]], reason):
+        logger.error(
+            f'Пачка пополнения в сети {chain.upper()} не прошла ({reason}), '
+            f'{len(batch)} кошельков будут пополнены по одному: '
+            + ', '.join(wallet for wallet, _ in batch)
+        )
+
+    async def withdraw(
+            self,
+            chain: str,
+            amounts: Dict[str, int],
+    ) -> List[str]:
+        def submit() -> List[str]:
+            action = Okx(token='ETH')
+            if action.select_chain(chain) is None:
+                raise Exception('сеть не найдена в API OKX')
+            submitted = []
+
+            for wallet, amount_wei in amounts.items():
+                try:
+                    if action.submit_checked(
+                            chain=chain,
+                            # OKX округляет до 6 знаков, округляем вверх
+                            amount=math.ceil(amount_wei / 10 ** 12) / 10 ** 6,
+                            address=wallet,
+                    ):
+                        submitted.append(wallet)
+                except ccxt.NetworkError as e:
+                    # вывод мог пройти, поступление проверим по балансу
+                    logger.warning(
+                        f'{wallet} | Нет ответа OKX на запрос вывода, '
+                        f'жду поступления по балансу: {e}'
+                    )
+                    submitted.append(wallet)
+                except Exception as e:
+                    logger.error(
+                        f'{wallet} | Не удалось вывести $ETH с OKX: {e}'
+                    )
+
+            return submitted
+
+        try:
+            return await asyncio.to_thread(submit)
+        except Exception as e:
+            logger.error(f'OKX | Вывод в сеть {chain.upper()} не удался: {e}')
+            return []
+
+    async def wait_funded(
+            self,
+            chain: str,
+            amounts: Dict[str, int],
+            wallets: List[str],
+    ) -> List[str]:
+        # поступление проверяем по балансам в сети одним multicall
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        targets = {
+            wallet: self.quotes.balances[wallet][chain] + amounts[wallet]
+            for wallet in wallets
+        }
+
+        while True:
+            balances = await self.quotes.get_balances(chain, list(targets))
+            targets = {
+                wallet: target
+                for wallet, target in targets.items()
+                if balances.get(wallet, 0) < target
+            }
+
+            if not targets or loop.time() > deadline:
+                return list(targets)
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def fund_chain(self, chain: str, amounts: Dict[str, int]):
+        logger.info(
+            f'Пополняю {len(amounts)} кошельков в сети {chain.upper()} '
+            f'на {round(sum(amounts.values()) / 10 ** 18, 6)} $ETH '
+            f'({self.mode})...'
+        )
+
+        if self.mode == 'disperse':
+            sent = await self.disperse(chain, amounts)
+        else:
+            sent = await self.withdraw(chain, amounts)
+
+        pending = await self.wait_funded(chain, amounts, sent)
+        sent = set(sent)
+        pending += [wallet for wallet in amounts if wallet not in sent]
+
+        if pending:
+            logger.warning(
+                f'В сети {chain.upper()} не дождался пополнения '
+                f'{len(pending)}/{len(amounts)} кошельков, они будут '
+                f'пополнены по одному'
+            )
+        else:
+            logger.success(
+                f'Все {len(amounts)} кошельков в сети {chain.upper()} '
+                f'пополнены'
+            )
+
+    async def run(self):
+        if self.mode is None:
+            return
+
+        shortfalls = self.plan()
+
+        if not shortfalls:
+            logger.info('Пополнение не требуется')
+            return
+
+        # клейм начинается только после пополнения всех сетей
+        await asyncio.gather(*[
+            self.fund_chain(chain, amounts)
+            for chain, amounts in shortfalls.items()
+        ])
+
+
+funding = FundingPlan(
+    quotes=claim_quotes,
+    mode=FUNDING_MODE,
+    hot_key=FUNDING_HOT_WALLET_KEY,
+    margin=FUNDING_MARGIN,
+    batch_size=FUNDING_BATCH_SIZE,
+    timeout=FUNDING_TIMEOUT,
+)
@@ -0,0 +1,116 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.database import Database
+from loguru import logger
+
+
+class GasLimits:
+    """Лимиты газа по (контракт, селектор и длина данных), выученные по
+    gasUsed реальных транзакций: для вызовов с постоянным расходом газа
+    заменяют estimate_gas, для остальных - нижняя граница оценки"""
+
+    # gasUsed в Arbitrum включает L1-часть, которая зависит от цены L1
+    SKIP_CHAINS = ['arbitrum']
+    # ERC-20 transfer: расход не зависит от аргументов
+    STABLE_SELECTORS = ['0xa9059cbb']
+
+    def __init__(
+            self,
+            chain: str,
+            db: Database,
+            outlier_ratio: float = 1.3,
+    ):
+        self.chain = chain
+        self.db = db
+        self.outlier_ratio = outlier_ratio
+        self.limits: Dict[Tuple[str, str], int] = {}
+        self.sent: Dict[str, Tuple[str, str]] = {}
+        self.loaded = False
+        self.lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(contract_txn: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        data = contract_txn.get('data')
+        to_address = contract_txn.get('to')
+
+        if not data or not to_address:
+            return None
+
+        data = str(data)
+
+        # длина данных меняется вместе с расходом газа (пруфы, пачки)
+        return to_address.lower(), f'{data[:10]}:{len(data)}'
+
+    async def load(self):
+        async with self.lock:
+            if self.loaded:
+                return
+
+            for contract, selector, gas_limit in await self.db.get_gas_limits(
+                    self.chain
+            ):
+                self.limits[(contract, selector)] = gas_limit
+            self.loaded = True
+
+    async def get(self, contract_txn: Dict[str, Any]) -> Optional[int]:
+        if self.chain in self.SKIP_CHAINS:
+            return None
+
+        if not self.loaded:
+            await self.load()
+
+        gas_limit = self.limits.get(self.make_key(contract_txn))
+
+        if gas_limit is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return gas_limit
+
+    def is_stable(self, contract_txn: Dict[str, Any]) -> bool:
+        return str(contract_txn.get('data', ''))[:10] in self.STABLE_SELECTORS
+
+    def track(self, tx_hash: str, contract_txn: Dict[str, Any]):
+        key = self.make_key(contract_txn)
+
+        if key is not None and self.chain not in self.SKIP_CHAINS:
+            self.sent[tx_hash] = key
+
+    def forget(self, tx_hashes: List[str]):
+        for tx_hash in tx_hashes:
+            self.sent.pop(tx_hash, None)
+
+    async def learn(self, tx_hash: str, receipt: Dict[str, Any]):
+        key = self.sent.pop(tx_hash, None)
+        if key is None:
+            return
+
+        gas_used = int(receipt['gasUsed'], 16)
+        gas_limit = self.limits.get(key)
+
+        # после ошибки или аномального расхода снова оцениваем через RPC
+        if int(receipt['status'], 16) != 1 or (
+                gas_limit and gas_used > gas_limit * self.outlier_ratio
+        ):
+            logger.debug(
+                f'{self.chain} | Сбрасываю лимит газа {key}: '
+                f'{gas_limit} -> {gas_used}'
+            )
+            self.limits.pop(key, None)
+            await self.db.delete_gas_limit(self.chain, *key)
+            return
+
+        if gas_limit is None or gas_used > gas_limit:
+            self.limits[key] = gas_used
+            await self.db.save_gas_limit(self.chain, *key, gas_used)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'limits': len(self.limits),
+        }
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+import aiohttp
+from data.config import RATE_LIMIT_DEFAULT, RATE_LIMITS
+from loguru import logger
+
+
+class RateGovernor:
+    """Token bucket на хост, скорость подбирается по AIMD.
+
+    Успешные ответы понемногу поднимают скорость до потолка, 429 и
+    таймауты режут ее в разы. Работает и из asyncio, и из потоков (OKX).
+    """
+
+    def __init__(
+            self,
+            host: str,
+            ceiling: float,
+            floor: float = 0.2,
+            increase: float = 0.5,
+            decrease: float = 0.5,
+            decrease_cooldown: float = 1,
+    ):
+        self.host = host
+        self.ceiling = ceiling
+        self.floor = min(floor, ceiling)
+        self.increase = increase
+        self.decrease = decrease
+        self.decrease_cooldown = decrease_cooldown
+        self.rate = ceiling
+        self.tokens = 1.0
+        self.updated_at = time.monotonic()
+        self.decreased_at = 0.0
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttles = 0
+
+    def reserve(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                max(self.rate, 1.0),
+                self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            self.tokens -= 1
+            self.requests += 1
+
+            if self.tokens >= 0:
+                return 0
+
+            return -self.tokens / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def acquire_sync(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(
+                self.ceiling,
+                self.rate + self.increase / max(self.rate, 1.0)
+            )
+
+    def on_throttle(self):
+        with self.lock:
+            now = time.monotonic()
+            self.throttles += 1
+
+            # все запросы, что уже были в полете, снижают скорость один раз
+            if now - self.decreased_at < self.decrease_cooldown:
+                return
+
+            self.decreased_at = now
+            self.rate = max(self.floor, self.rate * self.decrease)
+
+        logger.warning(
+            f'{self.host} | Ограничение запросов, снижаю скорость до '
+            f'{round(self.rate, 2)} запр./сек.'
+        )
+
+    def stats(self) -> Dict:
+        return {
+            'host': self.host,
+            'rate': round(self.rate, 2),
+            'ceiling': self.ceiling,
+            'requests': self.requests,
+            'throttles': self.throttles,
+        }
+
+
+def is_throttled(error: BaseException) -> bool:
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+
+    return (
+        isinstance(error, aiohttp.ClientResponseError)
+        and error.status == 429
+    )
+
+
+governors: Dict[str, RateGovernor] = {}
+governors_lock = threading.Lock()
+
+
+def get_governor(url: str) -> RateGovernor:
+    host = urlparse(url).hostname if '://' in url else url
+
+    with governors_lock:
+        governor = governors.get(host)
+
+        if governor is None:
+            governor = RateGovernor(
+                host=host,
+                ceiling=RATE_LIMITS.get(host, RATE_LIMIT_DEFAULT),
+            )
+            governors[host] = governor
+
+    return governor
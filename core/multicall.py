@@ -0,0 +1,52 @@
+from typing import List, Tuple
+
+from core.const import MULTICALL3_ADDRESS
+from core.registry import get_client
+from eth_abi import decode, encode
+from hexbytes import HexBytes
+
+
+class Multicall:
+    """Пачка eth_call через Multicall3.aggregate3 одним запросом"""
+
+    AGGREGATE3_SELECTOR = '0x82ad56cb'
+
+    def __init__(self, chain: str, batch_size: int = 500):
+        self.chain = chain
+        self.batch_size = batch_size
+        self.provider = get_client(chain).provider
+        self.address = self.provider.to_checksum_address(MULTICALL3_ADDRESS)
+
+    def encode_calls(self, calls: List[Tuple[str, str]]) -> str:
+        encoded = encode(
+            ['(address,bool,bytes)[]'],
+            [[
+                (
+                    self.provider.to_checksum_address(target),
+                    True,
+                    HexBytes(call_data),
+                )
+                for target, call_data in calls
+            ]]
+        )
+
+        return self.AGGREGATE3_SELECTOR + encoded.hex()
+
+    async def aggregate(
+            self,
+            calls: List[Tuple[str, str]]
+    ) -> List[Tuple[bool, bytes]]:
+        results = []
+
+        for i in range(0, len(calls), self.batch_size):
+            response = await self.provider.eth.call({
+                'to': self.address,
+                'data': self.encode_calls(calls[i:i + self.batch_size]),
+            })
+            results.extend(decode(['(bool,bytes)[]'], response)[0])
+
+        return results
+
+    @staticmethod
+    def encode_address_call(selector: str, wallet: str) -> str:
+        return selector + encode(['address'], [wallet]).hex()
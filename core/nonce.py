@@ -0,0 +1,164 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+from core.database import Database
+from core.receipts import ReceiptWatcher
+from loguru import logger
+
+
+class NonceManager:
+    """Выдает nonce кошелька локально, чтобы отправлять транзакции подряд,
+    не дожидаясь подтверждения предыдущей"""
+
+    def __init__(
+            self,
+            chain: str,
+            wallet: str,
+            make_request: Callable[..., Awaitable[Dict]],
+            receipts: ReceiptWatcher,
+            db: Database,
+            settle_timeout: float = 600,
+    ):
+        self.chain = chain
+        self.wallet = wallet
+        self.make_request = make_request
+        self.receipts = receipts
+        self.db = db
+        self.settle_timeout = settle_timeout
+        self.next_nonce = None
+        self.lock = asyncio.Lock()
+
+    async def request(self, method: str, params) -> Dict:
+        response = await self.make_request(method, params)
+
+        if 'error' in response:
+            raise ValueError(f'{method}: {response["error"]}')
+
+        return response.get('result')
+
+    async def get_count(self, block: str) -> int:
+        return int(await self.request(
+            'eth_getTransactionCount',
+            [self.wallet, block]
+        ), 16)
+
+    async def is_known(self, tx_hash: str) -> bool:
+        return bool(await self.request('eth_getTransactionByHash', [tx_hash]))
+
+    async def sync(self):
+        latest, pending = await asyncio.gather(
+            self.get_count('latest'),
+            self.get_count('pending'),
+        )
+
+        # записанные транзакции, которые RPC еще видит, занимают свои nonce;
+        # с первой потерянной продолжаем, чтобы не оставить дыру
+        nonce = latest
+        for record_nonce, tx_hash, _ in await self.db.get_transactions(
+                self.chain,
+                self.wallet,
+                latest,
+        ):
+            if record_nonce != nonce or not await self.is_known(tx_hash):
+                break
+            nonce += 1
+
+        self.next_nonce = max(nonce, pending)
+
+    async def reserve(self) -> int:
+        async with self.lock:
+            if self.next_nonce is None:
+                await self.sync()
+
+            nonce = self.next_nonce
+            self.next_nonce += 1
+
+            return nonce
+
+    def release(self, nonce: int):
+        # транзакция не ушла: вернуть nonce можно, только если он последний,
+        # иначе перечитываем состояние из сети при следующей выдаче
+        if self.next_nonce == nonce + 1:
+            self.next_nonce = nonce
+        else:
+            self.reset()
+
+    def reset(self):
+        self.next_nonce = None
+
+    async def sent(self, nonce: int, tx_hash: str):
+        # транзакция уже в сети: ошибка записи не должна выдавать ее
+        # за неотправленную, строка будет записана по квитанции
+        try:
+            await self.db.save_transaction(
+                self.chain,
+                self.wallet,
+                nonce,
+                tx_hash,
+            )
+        except Exception as e:
+            logger.warning(
+                f'{self.wallet} | Не удалось записать транзакцию '
+                f'{tx_hash} в базу: {e}'
+            )
+
+    async def finished(
+            self,
+            tx_hash: str,
+            status: bool,
+            nonce: Optional[int] = None,
+    ):
+        status = 'mined' if status else 'failed'
+
+        # при замене в базе записан последний отправленный хэш,
+        # а в блок мог попасть любой из них
+        if nonce is not None:
+            await self.db.save_transaction(
+                self.chain,
+                self.wallet,
+                nonce,
+                tx_hash,
+                status,
+            )
+        else:
+            await self.db.update_transaction_status(tx_hash, status)
+
+    async def settle(self) -> int:
+        # транзакции прошлого запуска должны завершиться до проверок
+        # состояния, иначе клейм или трансфер уйдут повторно
+        settled = 0
+
+        for _, tx_hash, status in await self.db.get_transactions(
+                self.chain,
+                self.wallet,
+        ):
+            if status != 'sent':
+                continue
+
+            if not await self.is_known(tx_hash):
+                await self.db.update_transaction_status(tx_hash, 'dropped')
+                continue
+
+            logger.info(
+                f'{self.wallet} | Жду транзакцию прошлого запуска в сети '
+                f'{self.chain.upper()}: {tx_hash}'
+            )
+
+            try:
+                receipt = await self.receipts.wait(
+                    tx_hash,
+                    timeout=self.settle_timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f'{self.wallet} | Транзакция {tx_hash} все еще '
+                    f'не в блоке'
+                )
+                continue
+
+            await self.finished(tx_hash, int(receipt['status'], 16) == 1)
+            settled += 1
+
+        self.reset()
+
+        return settled
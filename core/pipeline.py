@@ -0,0 +1,355 @@
+import asyncio
+import random
+import traceback
+from typing import Dict, List
+
+from core.allocation import Allocation
+from core.claimer import Claimer
+from core.database import Database
+from core.enums import ClaimStatus
+from core.exceptions import OkxNetworkDisabled
+from core.planner import planner
+from core.quotes import claim_quotes
+from core.registry import settle_transactions
+from core.transfer import Transfer
+from core.utils import get_address_wallet, log_claim_status
+from data.config import CHAINS, CLAIM_DELAY
+from loguru import logger
+
+
+class WalletJob:
+    def __init__(self, index: int, total: int, key: str):
+        self.index = index
+        self.total = total
+        self.key = key
+        self.wallet = get_address_wallet(key)
+        self.deposit_address = None
+        self.chains = random.sample(CHAINS, len(CHAINS))
+        self.chain = None
+        self.first_iter = True
+        self.claimer = None
+        self.transfer = None
+        self.allocation = 0
+        self.amount_wei = 0
+        self.proof_addresses = []
+        self.donate_amount_wei = 0
+        self.done = asyncio.get_running_loop().create_future()
+
+
+class Pipeline:
+    STAGES = ['scan', 'allocation', 'funding', 'claim', 'transfer']
+
+    def __init__(
+            self,
+            db: Database,
+            proxies: List[str],
+            workers: Dict[str, int],
+            queue_size: int = 100,
+            max_in_flight: int = 200,
+            stats_interval: int = 60,
+    ):
+        self.db = db
+        self.proxies = proxies
+        self.workers = workers
+        self.stats_interval = stats_interval
+        self.queues = {
+            stage: asyncio.Queue(maxsize=queue_size)
+            for stage in self.STAGES
+        }
+        self.in_flight = asyncio.Semaphore(max(1, max_in_flight))
+        self.in_flight_count = 0
+        self.tasks = set()
+
+    async def submit(self, index: int, total: int, key: str):
+        await self.in_flight.acquire()
+        self.in_flight_count += 1
+
+        job = WalletJob(index=index, total=total, key=key)
+        logger.info(
+            f'[{job.index}/{job.total}] Работаем с кошельком {job.wallet}'
+        )
+        await self.queues['scan'].put(job)
+
+        return await job.done
+
+    async def run(self, jobs):
+        workers = [
+            asyncio.create_task(self.worker(stage))
+            for stage in self.STAGES
+            for _ in range(max(1, self.workers.get(stage, 1)))
+        ]
+        monitor = asyncio.create_task(self.monitor())
+
+        try:
+            return await jobs
+        finally:
+            for task in workers + [monitor]:
+                task.cancel()
+            logger.info(f'Конвейер | {self.format_stats()}')
+
+    def stats(self) -> Dict[str, int]:
+        stats = {
+            stage: queue.qsize()
+            for stage, queue in self.queues.items()
+        }
+        stats['in_flight'] = self.in_flight_count
+
+        return stats
+
+    def format_stats(self) -> str:
+        return ', '.join(
+            f'{stage}: {size}' for stage, size in self.stats().items()
+        )
+
+    async def monitor(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            logger.info(f'Конвейер | очереди: {self.format_stats()}')
+
+    async def worker(self, stage: str):
+        queue = self.queues[stage]
+        handler = getattr(self, f'stage_{stage}')
+
+        while True:
+            job = await queue.get()
+            try:
+                await handler(job)
+            except Exception as e:
+                traceback.print_exc()
+                logger.error(
+                    f'{job.wallet} | Ошибка на этапе {stage}: {e}'
+                )
+                await self.finish(job, ClaimStatus.ERROR)
+            finally:
+                queue.task_done()
+
+    def forward(self, stage: str, job: WalletJob, delay: int = 0):
+        # медленные переходы (ожидания, повторы) не занимают воркеров
+        async def _forward():
+            if delay:
+                await asyncio.sleep(delay)
+            await self.queues[stage].put(job)
+
+        task = asyncio.create_task(_forward())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def finish(self, job: WalletJob, claim_status: ClaimStatus = None):
+        if job.done.done():
+            return
+
+        if claim_status is not None:
+            log_claim_status(job.wallet, claim_status)
+            await self.db.update_claim_status(
+                job.wallet,
+                claim_status,
+                allocation=job.allocation,
+                claimed=claim_status != ClaimStatus.ERROR,
+            )
+
+        claim_quotes.done(job.wallet)
+        self.in_flight_count -= 1
+        self.in_flight.release()
+        job.done.set_result(claim_status)
+
+    async def next_chain(self, job: WalletJob):
+        job.first_iter = False
+
+        # после неудачной попытки клейм мог все же пройти
+        if job.claimer and await job.claimer.is_claimed():
+            logger.info(
+                f'{job.wallet} | Дроп уже заклеймлен, '
+                f'пропускаем кошелек...'
+            )
+            await self.finish(job, ClaimStatus.ALREADY_CLAIMED)
+            return
+
+        if not job.chains:
+            await self.finish(job, ClaimStatus.ERROR)
+            return
+
+        self.forward('funding', job)
+
+    async def stage_scan(self, job: WalletJob):
+        wallet_data = await self.db.get_wallets_by_status(ClaimStatus.SUCCESS)
+        if wallet_data and job.wallet in [w[0] for w in wallet_data]:
+            logger.warning(
+                f'{job.wallet} | Уже работали с кошельком, пропускаем...'
+            )
+            await self.finish(job)
+            return
+
+        job.deposit_address = await self.db.get_deposit_address(job.wallet)
+        if not job.deposit_address:
+            logger.error(
+                f'{job.wallet} | Не найден депозитный адрес в базе данных'
+            )
+            await self.finish(job)
+            return
+
+        scan_result = await self.db.get_scan_result(job.wallet)
+
+        # транзакции прошлого запуска изменили состояние после скана
+        if await settle_transactions(job.wallet, self.db):
+            scan_result = None
+
+        if scan_result:
+            chain, amount_wei, is_claimed = scan_result
+        else:
+            chain, amount_wei = (
+                await Claimer.search_zro_balance_in_all_chains(
+                    wallet=job.wallet,
+                )
+            )
+            is_claimed = None
+
+        if chain and amount_wei:
+            job.chain = chain
+            job.allocation = round(amount_wei / 10 ** 18, 2)
+            logger.info(
+                f'{job.wallet} | Нашли {job.allocation} $ZRO'
+                f' в сети {chain.upper()}'
+            )
+            self.forward(
+                'transfer',
+                job,
+                delay=random.randint(*CLAIM_DELAY)
+            )
+            return
+
+        if is_claimed is None:
+            claimer = Claimer(
+                chain='arbitrum',
+                key=job.key,
+                proxies=self.proxies,
+            )
+            is_claimed = await claimer.is_claimed()
+
+        if is_claimed:
+            await self.finish(job, ClaimStatus.ALREADY_CLAIMED)
+            return
+
+        await self.queues['allocation'].put(job)
+
+    async def stage_allocation(self, job: WalletJob):
+        action = Allocation(
+            wallet=job.wallet,
+            proxies=self.proxies,
+            db=self.db,
+        )
+        response = await action.get_proof()
+        allocation = action.parse_allocation(response)
+
+        if allocation is None:
+            await self.finish(job, ClaimStatus.ERROR)
+            return
+
+        if float(allocation) == 0:
+            await self.finish(job, ClaimStatus.WITHOUT_ALLOCATION)
+            return
+
+        job.allocation = allocation
+        job.amount_wei = int(response.get('amount'))
+        job.proof_addresses = response.get('proof').split('|')
+        job.chains = await planner.plan(
+            key=job.key,
+            deposit_address=job.deposit_address,
+            proxies=self.proxies,
+            amount_wei=job.amount_wei,
+            proof_addresses=job.proof_addresses,
+        )
+        logger.info(
+            f'{job.wallet} | Аллокация найдена: {allocation} $ZRO'
+        )
+
+        await self.queues['funding'].put(job)
+
+    async def stage_funding(self, job: WalletJob):
+        job.chain = job.chains.pop(0)
+        job.claimer = Claimer(
+            chain=job.chain,
+            key=job.key,
+            proxies=self.proxies,
+            deposit_address=job.deposit_address,
+        )
+        job.transfer = job.claimer.make_transfer(job.deposit_address)
+        logger.info(
+            f'{job.wallet} | Выбрана сеть: {job.chain.upper()}'
+        )
+
+        try:
+            job.donate_amount_wei = await job.claimer.get_amount_donate(
+                allocation=job.amount_wei,
+                first_iter=job.first_iter,
+            )
+            is_funded = await job.claimer.fund(
+                amount_wei=job.amount_wei,
+                donate_amount_wei=job.donate_amount_wei,
+                transfer=job.transfer,
+            )
+        except OkxNetworkDisabled:
+            is_funded = False
+        except Exception as e:
+            logger.error(
+                f'{job.wallet} | Ошибка при подготовке к клейму в сети '
+                f'{job.chain.upper()}: {e}'
+            )
+            is_funded = False
+
+        if not is_funded:
+            await self.next_chain(job)
+            return
+
+        await self.queues['claim'].put(job)
+
+    async def stage_claim(self, job: WalletJob):
+        status = await job.claimer.claim(
+            amount_wei=job.amount_wei,
+            proof_addresses=job.proof_addresses,
+            donate_amount_wei=job.donate_amount_wei,
+            transfer=job.transfer,
+        )
+
+        if not status:
+            await self.next_chain(job)
+            return
+
+        claim_quotes.done(job.wallet)
+
+        if job.claimer.claims_to_deposit:
+            await self.db.set_claimed_to(job.wallet, job.claimer.receiver)
+            await self.finish(job, ClaimStatus.SUCCESS)
+            return
+
+        if job.transfer and job.transfer.status:
+            await self.finish(job, ClaimStatus.SUCCESS)
+            return
+
+        task = asyncio.create_task(self.wait_zro(job))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def wait_zro(self, job: WalletJob):
+        try:
+            await job.claimer.wait_zro_balance()
+        except Exception as e:
+            logger.error(f'{job.wallet} | Ошибка при ожидании $ZRO: {e}')
+            await self.finish(job, ClaimStatus.ERROR)
+            return
+
+        self.forward('transfer', job, delay=random.randint(*CLAIM_DELAY))
+
+    async def stage_transfer(self, job: WalletJob):
+        transfer_action = Transfer(
+            chain=job.chain,
+            key=job.key,
+            deposit_address=job.deposit_address,
+            proxies=self.proxies,
+        )
+
+        status = await transfer_action.run()
+
+        await self.finish(
+            job,
+            ClaimStatus.SUCCESS if status else ClaimStatus.ERROR
+        )
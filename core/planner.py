@@ -0,0 +1,304 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from core.claimer import Claimer
+from core.utils import checksum_deposit_address, get_address_wallet
+from core.withdraw.base import Base
+from core.withdraw.okx_ import Okx
+from data.config import CHAIN_POLICY, CHAIN_POLICY_TOLERANCE, CHAINS
+from eth_abi import encode
+from loguru import logger
+
+
+class ChainPlanner:
+    """Считает стоимость клейма во всех сетях одновременно и выбирает
+    порядок сетей: лучшая первой, остальные - запасные"""
+
+    POLICIES = ['random', 'cheapest', 'fastest']
+    # если газ не выучен и не оценивается (не хватает баланса)
+    DEFAULT_CLAIM_GAS = 500000
+    DEFAULT_TRANSFER_GAS = 150000
+    TRANSFER_SELECTOR = '0xa9059cbb'
+
+    def __init__(
+            self,
+            chains: List[str],
+            policy: str = 'cheapest',
+            tolerance: float = 0.1,
+            okx_ttl: float = 600,
+    ):
+        if policy not in self.POLICIES:
+            raise ValueError(
+                f'Неизвестная политика выбора сети: {policy}, '
+                f'доступные: {self.POLICIES}'
+            )
+
+        self.chains = chains
+        self.policy = policy
+        self.tolerance = tolerance
+        self.okx_ttl = okx_ttl
+        self.okx_chains = None
+        self.okx_checked_at = 0.0
+        self.okx_lock = asyncio.Lock()
+        # кошелек -> сеть, в которой он уже пополнен до старта
+        self.pinned: Dict[str, str] = {}
+
+    async def get_okx_chains(self) -> Optional[Dict[str, Dict]]:
+        async with self.okx_lock:
+            if time.monotonic() - self.okx_checked_at < self.okx_ttl:
+                return self.okx_chains
+
+            try:
+                self.okx_chains = await asyncio.to_thread(
+                    lambda: Okx(token='ETH').get_chains_list()
+                )
+            except Exception as e:
+                logger.warning(
+                    f'OKX | Не удалось получить сети для вывода $ETH, '
+                    f'сравниваю сети без учета биржи: {e}'
+                )
+                self.okx_chains = None
+
+            self.okx_checked_at = time.monotonic()
+
+            return self.okx_chains
+
+    @staticmethod
+    async def get_gas(
+            claimer: Claimer,
+            contract_txn: Dict[str, Any],
+            default: int,
+    ) -> int:
+        try:
+            return await claimer.get_gas_limit(dict(contract_txn))
+        except Exception:
+            # например, на балансе не хватает на донат
+            gas_limit = await claimer.client.gas_limits.get(contract_txn)
+
+            return default if gas_limit is None else gas_limit
+
+    async def quote_chain(
+            self,
+            chain: str,
+            key: str,
+            deposit_address: str,
+            proxies: List[str],
+            amount_wei: int,
+            proof_addresses: List[str],
+            donate_amount_wei: int,
+            okx_chains: Optional[Dict[str, Dict]],
+    ) -> Dict[str, Any]:
+        quote = {'chain': chain, 'feasible': False}
+
+        try:
+            claimer = Claimer(
+                chain=chain,
+                key=key,
+                proxies=proxies,
+                deposit_address=deposit_address,
+            )
+            (extra_bytes, l0_fee), fees, balance = await asyncio.gather(
+                claimer.get_extra_bytes(amount_wei=amount_wei),
+                claimer.client.fees.quote(),
+                claimer.provider.eth.get_balance(claimer.wallet),
+            )
+
+            claim_txn = {
+                'from': claimer.wallet,
+                'to': claimer.contract_address,
+                'value': int(donate_amount_wei + l0_fee),
+                'data': claimer.build_claim_data(
+                    donate_amount_wei=donate_amount_wei,
+                    amount_wei=amount_wei,
+                    proof_addresses=proof_addresses,
+                    extra_bytes=extra_bytes,
+                ),
+            }
+            gas = await self.get_gas(
+                claimer,
+                claim_txn,
+                self.DEFAULT_CLAIM_GAS
+            )
+
+            # при клейме на депозит трансфера не будет
+            if not claimer.claims_to_deposit:
+                gas += await self.get_gas(
+                    claimer,
+                    {
+                        'from': claimer.wallet,
+                        'to': claimer.client.token_address,
+                        'data': self.TRANSFER_SELECTOR + encode(
+                            ['address', 'uint256'],
+                            [
+                                checksum_deposit_address(deposit_address),
+                                amount_wei,
+                            ]
+                        ).hex(),
+                    },
+                    self.DEFAULT_TRANSFER_GAS,
+                )
+
+            gas_cost = gas * fees['gas_price']
+            shortfall = max(
+                0,
+                donate_amount_wei + l0_fee + gas_cost - balance
+            )
+            quote.update({
+                'l0_fee': l0_fee,
+                'gas': gas,
+                'gas_price': fees['gas_price'],
+                'base_fee': fees['base_fee'],
+                'balance': balance,
+                'shortfall': shortfall,
+                'withdraw_fee': 0,
+                'cost': l0_fee + gas_cost,
+                'feasible': True,
+            })
+
+            if shortfall and okx_chains is not None:
+                details = okx_chains.get(Base.CHAIN_NAMES.get(chain), {})
+                quote['feasible'] = bool(details.get('withdrawEnable'))
+                quote['withdraw_fee'] = int(
+                    float(details.get('withdrawFee') or 0) * 10 ** 18
+                )
+                quote['cost'] += quote['withdraw_fee']
+
+        except Exception as e:
+            quote['error'] = str(e)
+
+        return quote
+
+    def pin(self, wallet: str, chain: str):
+        self.pinned[wallet] = chain
+
+    def apply_pin(self, wallet: str, chains: List[str]) -> List[str]:
+        chain = self.pinned.get(wallet)
+
+        if chain not in chains:
+            return chains
+
+        return [chain] + [item for item in chains if item != chain]
+
+    def sort_key(self, quote: Dict[str, Any]):
+        if self.policy == 'fastest':
+            # без вывода с биржи клейм начинается сразу
+            return bool(quote['shortfall']), quote['cost']
+
+        return quote['cost']
+
+    def order(self, quotes: List[Dict[str, Any]]) -> List[str]:
+        feasible = sorted(
+            [quote for quote in quotes if quote['feasible']],
+            key=self.sort_key
+        )
+        rest = [quote['chain'] for quote in quotes if not quote['feasible']]
+        random.shuffle(rest)
+
+        if not feasible:
+            return rest
+
+        # почти одинаковые по стоимости сети выбираем рандомно
+        best = feasible[0]
+
+        def is_tie(quote: Dict[str, Any]) -> bool:
+            if self.policy == 'fastest' and (
+                    bool(quote['shortfall']) != bool(best['shortfall'])
+            ):
+                return False
+
+            return quote['cost'] <= best['cost'] * (1 + self.tolerance)
+
+        ties = [quote for quote in feasible if is_tie(quote)]
+        random.shuffle(ties)
+
+        return [quote['chain'] for quote in ties] + [
+            quote['chain'] for quote in feasible if quote not in ties
+        ] + rest
+
+    @staticmethod
+    def format_quote(quote: Dict[str, Any]) -> str:
+        if 'error' in quote:
+            return f'{quote["chain"].upper()}: ошибка ({quote["error"]})'
+
+        def eth(value: int) -> str:
+            return f'{round(value / 10 ** 18, 6)}'
+
+        return (
+            f'{quote["chain"].upper()}: '
+            f'{"" if quote["feasible"] else "недоступна, "}'
+            f'стоимость {eth(quote["cost"])} $ETH '
+            f'(L0 {eth(quote["l0_fee"])}, газ {quote["gas"]} x '
+            f'{round(quote["gas_price"] / 10 ** 9, 4)} gwei, '
+            f'вывод OKX {eth(quote["withdraw_fee"])}), '
+            f'баланс {eth(quote["balance"])}, '
+            f'не хватает {eth(quote["shortfall"])}'
+        )
+
+    async def plan(
+            self,
+            key: str,
+            deposit_address: str,
+            proxies: List[str],
+            amount_wei: int,
+            proof_addresses: List[str],
+    ) -> List[str]:
+        if self.policy == 'random':
+            return self.apply_pin(
+                get_address_wallet(key),
+                random.sample(self.chains, len(self.chains))
+            )
+
+        arb_claimer = Claimer(chain='arbitrum', key=key, proxies=proxies)
+        try:
+            donate_amount_wei, okx_chains = await asyncio.gather(
+                arb_claimer.get_amount_donate(
+                    allocation=amount_wei,
+                    first_iter=False,
+                ),
+                self.get_okx_chains(),
+            )
+        except Exception as e:
+            logger.error(
+                f'{arb_claimer.wallet} | Не удалось сравнить сети, '
+                f'выбираю рандомно: {e}'
+            )
+            return self.apply_pin(
+                arb_claimer.wallet,
+                random.sample(self.chains, len(self.chains))
+            )
+
+        quotes = await asyncio.gather(*[
+            self.quote_chain(
+                chain=chain,
+                key=key,
+                deposit_address=deposit_address,
+                proxies=proxies,
+                amount_wei=amount_wei,
+                proof_addresses=proof_addresses,
+                donate_amount_wei=donate_amount_wei,
+                okx_chains=okx_chains,
+            )
+            for chain in self.chains
+        ])
+
+        chains = self.apply_pin(arb_claimer.wallet, self.order(quotes))
+
+        for quote in quotes:
+            logger.info(
+                f'{arb_claimer.wallet} | Сеть {self.format_quote(quote)}'
+            )
+        logger.info(
+            f'{arb_claimer.wallet} | Порядок сетей ({self.policy}): '
+            f'{", ".join(chain.upper() for chain in chains)}'
+        )
+
+        return chains
+
+
+planner = ChainPlanner(
+    chains=CHAINS,
+    policy=CHAIN_POLICY,
+    tolerance=CHAIN_POLICY_TOLERANCE,
+)
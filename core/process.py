@@ -1,16 +1,41 @@
+import asyncio
 import random
-import time
 import traceback
 from typing import List
 
-from core.allocation import Allocation
+from core.allocation import Allocation, prefetch_proofs
 from core.claimer import Claimer
 from core.database import Database
 from core.enums import ClaimStatus
 from core.exceptions import OkxNetworkDisabled
+from core.funding import funding
+from core.pipeline import Pipeline
+from core.planner import planner
+from core.quotes import claim_quotes
+from core.registry import settle_transactions
+from core.scanner import scan_wallets
+from core.scheduler import DelayPlanner
 from core.transfer import Transfer
-from core.utils import get_address_wallet
-from data.config import CHAINS, ACCOUNT_DELAY, CLAIM_DELAY
+from core.utils import (
+    checksum_deposit_address,
+    get_address_wallet,
+    log_claim_status,
+)
+from data.config import (
+    CHAINS,
+    ACCOUNT_DELAY,
+    CLAIM_DELAY,
+    CLAIM_TO_DEPOSIT,
+    MAX_CONCURRENT_WALLETS,
+    PIPELINE,
+    PIPELINE_MAX_IN_FLIGHT,
+    PIPELINE_QUEUE_SIZE,
+    PIPELINE_WORKERS,
+    PROOF_PREFETCH_CONCURRENCY,
+    RUN_WINDOW,
+    SCAN_BATCH_SIZE,
+    WITHDRAW_DELAY,
+)
 from loguru import logger
 
 
@@ -21,6 +46,11 @@ async def initialize_database(
 ):
     await db.create_table()
 
+    # при клейме сразу на депозит ошибка в адресе будет стоить дропа
+    if CLAIM_TO_DEPOSIT:
+        for address in deposit_addresses:
+            checksum_deposit_address(address)
+
     existing_wallets = [record[0] for record in await db.get_all_wallets()]
 
     for key, deposit_address in zip(private_keys, deposit_addresses):
@@ -34,77 +64,231 @@ async def process_wallets(
         proxies: List[str],
         db: Database
 ):
-    for index, key in enumerate(private_keys, start=1):
-        wallet = get_address_wallet(key)
-
-        logger.info(
-            f'[{index}/{len(private_keys)}] Работаем с кошельком {wallet}'
+    total = len(private_keys)
+    wallets = [get_address_wallet(key) for key in private_keys]
+
+    try:
+        await scan_wallets(
+            wallets=wallets,
+            db=db,
+            batch_size=SCAN_BATCH_SIZE,
+        )
+    except Exception as e:
+        logger.error(
+            f'Ошибка при пакетном скане, кошельки будут '
+            f'проверены по одному: {e}'
         )
 
-        wallet_data = await db.get_wallets_by_status(ClaimStatus.SUCCESS)
-        if wallet_data and wallet in [w[0] for w in wallet_data]:
-            logger.warning(
-                f'{wallet} | Уже работали с кошельком, пропускаем...'
-            )
+    # пруфы нужны только тем, кому еще предстоит клейм
+    processed_wallets = [
+        w[0] for w in await db.get_wallets_by_status(ClaimStatus.SUCCESS)
+    ]
+    claim_wallets = []
+    for wallet in wallets:
+        scan_result = await db.get_scan_result(wallet)
+        if wallet in processed_wallets:
             continue
+        if not scan_result or not (scan_result[0] or scan_result[2]):
+            claim_wallets.append(wallet)
+
+    await prefetch_proofs(
+        wallets=claim_wallets,
+        proxies=proxies,
+        db=db,
+        concurrency=PROOF_PREFETCH_CONCURRENCY,
+    )
 
-        deposit_address = await db.get_deposit_address(wallet)
-        if not deposit_address:
-            logger.error(
-                f'{wallet} | Не найден депозитный адрес в базе данных'
-            )
-            continue
+    # донат и комиссия L0 не зависят от ключа: считаем заранее для всех
+    amounts = {}
+    for wallet in claim_wallets:
+        response = await db.get_proof(wallet)
+        if Allocation.has_claim(response):
+            amounts[wallet] = int(response.get('amount'))
+
+    try:
+        await claim_quotes.precompute(wallets=amounts, chains=CHAINS)
+    except Exception as e:
+        logger.error(
+            f'Ошибка при расчете котировок клейма, они будут '
+            f'получены по одному: {e}'
+        )
 
-        claim_status, allocation, is_transfer = await search_token(
-            wallet=wallet,
+    await funding.run()
+
+    refresher = None
+    if amounts and claim_quotes.ttl > 0:
+        refresher = asyncio.ensure_future(
+            claim_quotes.keep_fresh(wallets=amounts, chains=CHAINS)
+        )
+
+    # при RUN_WINDOW темп задает расписание: старт в свой слот не ждет
+    # кошельки из соседних слотов, иначе задержки снова суммируются
+    semaphore = asyncio.Semaphore(
+        max(1, len(private_keys) if RUN_WINDOW else MAX_CONCURRENT_WALLETS)
+    )
+    pipeline = Pipeline(
+        db=db,
+        proxies=proxies,
+        workers=PIPELINE_WORKERS,
+        queue_size=PIPELINE_QUEUE_SIZE,
+        max_in_flight=PIPELINE_MAX_IN_FLIGHT,
+    ) if PIPELINE else None
+
+    def start(index: int, key: str, account_delay: bool = True):
+        if pipeline:
+            return pipeline.submit(index=index, total=total, key=key)
+
+        return process_wallet(
+            index=index,
+            total=total,
             key=key,
             proxies=proxies,
-            deposit_address=deposit_address,
+            db=db,
+            semaphore=semaphore,
+            account_delay=account_delay,
         )
 
-        if not is_transfer:
-            claim_status, allocation = await claim(
-                key=key,
+    if RUN_WINDOW:
+        delay_planner = DelayPlanner(
+            window=int(RUN_WINDOW * 3600),
+            wallet_duration=int(
+                sum(CLAIM_DELAY) / 2 + sum(WITHDRAW_DELAY) / 2
+            ),
+        )
+        delay_planner.plan(private_keys)
+        delay_planner.log_schedule(labels=get_address_wallet)
+
+        jobs = delay_planner.run(
+            lambda index, key: start(index + 1, key, account_delay=False)
+        )
+    else:
+        jobs = asyncio.gather(
+            *[
+                start(index, key)
+                for index, key in enumerate(private_keys, start=1)
+            ],
+            return_exceptions=True,
+        )
+
+    try:
+        if pipeline:
+            await pipeline.run(jobs)
+        else:
+            await jobs
+    finally:
+        if refresher:
+            refresher.cancel()
+
+    logger.success(f'Завершили работу')
+
+
+async def process_wallet(
+        index: int,
+        total: int,
+        key: str,
+        proxies: List[str],
+        db: Database,
+        semaphore: asyncio.Semaphore,
+        account_delay: bool = True,
+):
+    async with semaphore:
+        wallet = get_address_wallet(key)
+
+        logger.info(
+            f'[{index}/{total}] Работаем с кошельком {wallet}'
+        )
+
+        # ошибка одного кошелька не должна останавливать остальные
+        try:
+            await run_wallet(
                 wallet=wallet,
-                deposit_address=deposit_address,
+                key=key,
                 proxies=proxies,
+                db=db,
+                account_delay=account_delay,
             )
+        except Exception as e:
+            traceback.print_exc()
+            logger.error(f'{wallet} | Ошибка при работе с кошельком: {e}')
 
-            if claim_status == ClaimStatus.SUCCESS:
-                logger.success(
-                    f'{wallet} | Успешно завершили работу с кошельком'
+            try:
+                await db.update_claim_status(wallet, ClaimStatus.ERROR)
+            except Exception as e:
+                logger.error(
+                    f'{wallet} | Не удалось записать статус в базу: {e}'
                 )
+        finally:
+            claim_quotes.done(wallet)
 
-            elif claim_status == ClaimStatus.WITHOUT_ALLOCATION:
-                logger.warning(
-                    f'{wallet} | На кошельке не найдена аллокация'
-                )
 
-            elif claim_status == ClaimStatus.ALREADY_CLAIMED:
-                logger.info(
-                    f'{wallet} | Дроп уже был заклеймлен на '
-                    f'кошельке, пропускаем...'
-                )
-            else:
-                logger.error(
-                    f'{wallet} | Ошибка: неизвестный статус клейма'
-                )
+async def run_wallet(
+        wallet: str,
+        key: str,
+        proxies: List[str],
+        db: Database,
+        account_delay: bool = True,
+):
+    wallet_data = await db.get_wallets_by_status(ClaimStatus.SUCCESS)
+    if wallet_data and wallet in [w[0] for w in wallet_data]:
+        logger.warning(
+            f'{wallet} | Уже работали с кошельком, пропускаем...'
+        )
+        return
 
-        await db.update_claim_status(
-            wallet,
-            claim_status,
-            allocation=allocation,
-            claimed=False if claim_status == ClaimStatus.ERROR else True
+    deposit_address = await db.get_deposit_address(wallet)
+    if not deposit_address:
+        logger.error(
+            f'{wallet} | Не найден депозитный адрес в базе данных'
         )
+        return
 
-        if claim_status == ClaimStatus.SUCCESS:
-            amt_sleep = random.randint(*ACCOUNT_DELAY)
-            logger.info(f'Сплю {amt_sleep} сек. между аккаунтами...')
-            time.sleep(amt_sleep)
-        else:
-            time.sleep(2)
+    scan_result = await db.get_scan_result(wallet)
 
-    logger.success(f'Завершили работу')
+    # транзакции прошлого запуска изменили состояние после скана
+    if await settle_transactions(wallet, db):
+        scan_result = None
+
+    claim_status, allocation, is_transfer = await search_token(
+        wallet=wallet,
+        key=key,
+        proxies=proxies,
+        deposit_address=deposit_address,
+        scan_result=scan_result,
+    )
+
+    if not is_transfer:
+        claim_status, allocation = await claim(
+            key=key,
+            wallet=wallet,
+            deposit_address=deposit_address,
+            proxies=proxies,
+            db=db,
+            scan_result=scan_result,
+        )
+        claim_quotes.done(wallet)
+
+        log_claim_status(wallet, claim_status)
+
+    await db.update_claim_status(
+        wallet,
+        claim_status,
+        allocation=allocation,
+        claimed=False if claim_status == ClaimStatus.ERROR else True
+    )
+
+    # при RUN_WINDOW паузы между кошельками задает планировщик
+    if not account_delay:
+        return
+
+    # задержка занимает только слот этого кошелька, остальные работают
+    if claim_status == ClaimStatus.SUCCESS:
+        amt_sleep = random.randint(*ACCOUNT_DELAY)
+        logger.info(
+            f'{wallet} | Сплю {amt_sleep} сек. между аккаунтами...'
+        )
+        await asyncio.sleep(amt_sleep)
+    else:
+        await asyncio.sleep(2)
 
 
 async def claim(
@@ -112,13 +296,50 @@ async def claim(
         wallet: str,
         deposit_address: str,
         proxies: List[str],
+        db: Database = None,
+        scan_result=None,
         allocation_amount=0,
 ):
+    db = db or Database()
     available_chains = ['arbitrum', 'base', 'optimism']
-    random.shuffle(CHAINS)
+
+    # статус клейма хранится в Arbitrum, проверяем его до планирования сети,
+    # чтобы не тратить запросы на заклеймленный кошелек
+    if scan_result:
+        already_claimed = scan_result[2]
+    else:
+        already_claimed = await Claimer(
+            chain='arbitrum',
+            key=key,
+            proxies=proxies,
+            deposit_address=deposit_address,
+        ).is_claimed()
+
+    if already_claimed:
+        logger.info(
+            f'{wallet} | Дроп уже заклеймлен, '
+            f'пропускаем кошелек...'
+        )
+        return ClaimStatus.ALREADY_CLAIMED, allocation_amount
+
+    response = await Allocation(
+        wallet=wallet,
+        proxies=proxies,
+        db=db,
+    ).get_proof()
+    if Allocation.has_claim(response):
+        chains = await planner.plan(
+            key=key,
+            deposit_address=deposit_address,
+            proxies=proxies,
+            amount_wei=int(response['amount']),
+            proof_addresses=response['proof'].split('|'),
+        )
+    else:
+        chains = random.sample(CHAINS, len(CHAINS))
     first_iter = True
 
-    for chain in CHAINS:
+    for chain in chains:
         try:
             if chain not in available_chains:
                 logger.error(
@@ -130,11 +351,11 @@ async def claim(
                 chain=chain,
                 key=key,
                 proxies=proxies,
+                deposit_address=deposit_address,
             )
 
-            already_claimed = await claim_action.is_claimed()
-
-            if already_claimed:
+            # после неудачной попытки клейм мог все же пройти
+            if not first_iter and await claim_action.is_claimed():
                 logger.info(
                     f'{wallet} | Дроп уже заклеймлен, '
                     f'пропускаем кошелек...'
@@ -153,7 +374,7 @@ async def claim(
                     f'{wallet} | Меняем сеть на {chain.upper()}'
                 )
 
-            action = Allocation(wallet=wallet, proxies=proxies)
+            action = Allocation(wallet=wallet, proxies=proxies, db=db)
             allocation_amount = await action.get_allocation()
 
             if allocation_amount is None:
@@ -169,14 +390,27 @@ async def claim(
                         f'{allocation_amount} $ZRO'
                     )
 
-                claim_status = await claim_action.run(first_iter)
+                transfer_action = claim_action.make_transfer(deposit_address)
+                claim_status = await claim_action.run(
+                    first_iter,
+                    transfer=transfer_action,
+                )
 
                 if not claim_status:
                     continue
 
+                if claim_action.claims_to_deposit:
+                    await db.set_claimed_to(wallet, claim_action.receiver)
+                    return ClaimStatus.SUCCESS, allocation_amount
+
+                if transfer_action and transfer_action.status:
+                    return ClaimStatus.SUCCESS, allocation_amount
+
                 amt_sleep = random.randint(*CLAIM_DELAY)
-                logger.info(f'Сплю {amt_sleep} сек. перед трансфером...')
-                time.sleep(amt_sleep)
+                logger.info(
+                    f'{wallet} | Сплю {amt_sleep} сек. перед трансфером...'
+                )
+                await asyncio.sleep(amt_sleep)
 
                 transfer_action = Transfer(
                     chain=chain,
@@ -214,6 +448,7 @@ async def search_token(
         key: str,
         proxies: List[str],
         deposit_address: str,
+        scan_result=None,
         status: bool = False,
 ):
     logger.info(
@@ -221,9 +456,12 @@ async def search_token(
         f'возможно дроп уже был заклеймлен...'
     )
 
-    chain, amount_wei = await Claimer.search_zro_balance_in_all_chains(
-        wallet=wallet,
-    )
+    if scan_result:
+        chain, amount_wei, _ = scan_result
+    else:
+        chain, amount_wei = await Claimer.search_zro_balance_in_all_chains(
+            wallet=wallet,
+        )
     allocation_amount = round(amount_wei / 10 ** 18, 2)
 
     if chain and allocation_amount:
@@ -233,8 +471,10 @@ async def search_token(
         )
 
         amt_sleep = random.randint(*CLAIM_DELAY)
-        logger.info(f'Сплю {amt_sleep} сек. перед трансфером...')
-        time.sleep(amt_sleep)
+        logger.info(
+            f'{wallet} | Сплю {amt_sleep} сек. перед трансфером...'
+        )
+        await asyncio.sleep(amt_sleep)
 
         transfer_action = Transfer(
             chain=chain,
@@ -0,0 +1,305 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import ClientTimeout
+from aiohttp_socks import ProxyConnector
+from better_proxy import Proxy
+from core.fingerprint import get_fingerprint
+from core.governor import get_governor, is_throttled
+from loguru import logger
+
+
+class ProxyState:
+    """Прокси со своей сессией и статистикой успешности и скорости"""
+
+    def __init__(self, url: Optional[str], alpha: float = 0.2):
+        self.url = url
+        self.alpha = alpha
+        self.session = None
+        # у прокси постоянный "браузер", как у живого пользователя
+        self.fingerprint = get_fingerprint()
+        self.latency = None
+        self.success_rate = 1.0
+        self.requests = 0
+        self.errors = 0
+        self.failures_in_row = 0
+        self.quarantined_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.quarantined_until
+
+    @property
+    def score(self) -> float:
+        latency = self.latency if self.latency is not None else 1.0
+        return latency / max(self.success_rate, 0.05)
+
+    def get_session(self, timeout: float) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = (
+                ProxyConnector.from_url(self.url) if self.url
+                else aiohttp.TCPConnector()
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=ClientTimeout(total=timeout),
+            )
+
+        return self.session
+
+    def record_success(self, latency: float):
+        self.requests += 1
+        self.failures_in_row = 0
+        self.success_rate += self.alpha * (1 - self.success_rate)
+
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.alpha * (latency - self.latency)
+
+    def record_failure(self, quarantine: float, max_quarantine: float):
+        self.requests += 1
+        self.errors += 1
+        self.failures_in_row += 1
+        self.success_rate *= 1 - self.alpha
+
+        backoff = min(
+            quarantine * 2 ** (self.failures_in_row - 1),
+            max_quarantine
+        )
+        self.quarantined_until = time.monotonic() + backoff
+
+    def stats(self) -> Dict:
+        return {
+            'proxy': self.url,
+            'latency': round(self.latency, 3) if self.latency else None,
+            'success_rate': round(self.success_rate, 3),
+            'requests': self.requests,
+            'errors': self.errors,
+            'available': self.available,
+        }
+
+
+class ProxyPool:
+    """Долгоживущий пул прокси: лучшие первыми, мертвые на карантине"""
+
+    pools: Dict[Tuple[str, ...], 'ProxyPool'] = {}
+
+    def __init__(
+            self,
+            proxies: List[str],
+            timeout: float = 10,
+            quarantine: float = 30,
+            max_quarantine: float = 600,
+            hedge: bool = False,
+            hedge_max: int = 3,
+            hedge_percentile: float = 0.9,
+            hedge_default_delay: float = 2,
+    ):
+        self.timeout = timeout
+        self.quarantine = quarantine
+        self.max_quarantine = max_quarantine
+        self.hedge = hedge
+        self.hedge_max = max(1, hedge_max)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_default_delay = hedge_default_delay
+        self.latencies = deque(maxlen=500)
+        self.durations = deque(maxlen=500)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.states = []
+
+        for proxy in proxies:
+            try:
+                self.states.append(ProxyState(Proxy.from_str(proxy).as_url))
+            except Exception as e:
+                logger.error(f'Не удалось разобрать прокси {proxy}: {e}')
+
+        if not proxies:
+            self.states.append(ProxyState(None))
+
+    @classmethod
+    def get(cls, proxies: List[str], **kwargs) -> 'ProxyPool':
+        key = tuple(proxies)
+        pool = cls.pools.get(key)
+
+        if pool is None:
+            pool = cls(proxies, **kwargs)
+            cls.pools[key] = pool
+
+        return pool
+
+    def ranked(self) -> List[ProxyState]:
+        available = [state for state in self.states if state.available]
+
+        if not available:
+            return sorted(
+                self.states,
+                key=lambda state: state.quarantined_until
+            )
+
+        # небольшой рандом, чтобы не бить всегда в один прокси
+        return sorted(
+            available,
+            key=lambda state: state.score * random.uniform(0.8, 1.2)
+        )
+
+    async def send(
+            self,
+            state: ProxyState,
+            method: str,
+            url: str,
+            headers: Dict[str, str],
+    ):
+        governor = get_governor(url)
+        await governor.acquire()
+        start = time.monotonic()
+
+        try:
+            async with state.get_session(self.timeout).request(
+                    method,
+                    url,
+                    headers={**state.fingerprint, **headers}
+            ) as response:
+                if response.status == 429:
+                    response.raise_for_status()
+                result = await response.json()
+
+        except asyncio.CancelledError:
+            # отмененный дубль - нижняя оценка задержки, иначе p90 занижается
+            self.latencies.append(time.monotonic() - start)
+            raise
+
+        except Exception as e:
+            if is_throttled(e):
+                governor.on_throttle()
+            state.record_failure(self.quarantine, self.max_quarantine)
+            raise
+
+        governor.on_success()
+        state.record_success(time.monotonic() - start)
+        self.latencies.append(time.monotonic() - start)
+        return result
+
+    async def request(
+            self,
+            method: str,
+            url: str,
+            headers: Dict[str, str],
+    ):
+        self.requests += 1
+        start = time.monotonic()
+
+        if self.hedge:
+            result = await self.hedged_request(method, url, headers)
+        else:
+            result = None
+            for state in self.ranked():
+                try:
+                    result = await self.send(state, method, url, headers)
+                    break
+                except Exception:
+                    continue
+
+        if result is not None:
+            self.durations.append(time.monotonic() - start)
+
+        return result
+
+    def hedge_delay(self) -> float:
+        if len(self.latencies) < 20:
+            return self.hedge_default_delay
+
+        return self.percentile(self.latencies, self.hedge_percentile)
+
+    async def hedged_request(
+            self,
+            method: str,
+            url: str,
+            headers: Dict[str, str],
+    ):
+        # если прокси не ответил за p-перцентиль задержки, дублируем запрос
+        # через следующий, берем первый валидный ответ, остальные отменяем
+        candidates = self.ranked()
+        pending = {}
+        attempt = 0
+        is_hedged = False
+
+        try:
+            while candidates or pending:
+                if candidates and len(pending) < self.hedge_max:
+                    task = asyncio.create_task(self.send(
+                        candidates.pop(0),
+                        method,
+                        url,
+                        headers,
+                    ))
+                    is_hedged = is_hedged or bool(pending)
+                    pending[task] = attempt
+                    attempt += 1
+
+                can_hedge = candidates and len(pending) < self.hedge_max
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay() if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                for task in done:
+                    index = pending.pop(task)
+
+                    if task.exception() is not None:
+                        continue
+
+                    result = task.result()
+                    if isinstance(result, dict):
+                        if is_hedged:
+                            self.hedged += 1
+                        if index > 0 and is_hedged:
+                            self.hedge_wins += 1
+                        return result
+
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if is_hedged:
+            self.hedged += 1
+
+    @staticmethod
+    def percentile(values, percentile: float) -> float:
+        values = sorted(values)
+        index = min(int(len(values) * percentile), len(values) - 1)
+
+        return values[index]
+
+    def request_stats(self) -> Dict[str, Any]:
+        durations = list(self.durations)
+
+        return {
+            'requests': self.requests,
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'hedge_delay': round(self.hedge_delay(), 3),
+            'p50': round(self.percentile(durations, 0.5), 3)
+            if durations else None,
+            'p99': round(self.percentile(durations, 0.99), 3)
+            if durations else None,
+        }
+
+    def stats(self) -> List[Dict]:
+        return [state.stats() for state in self.states]
+
+    @classmethod
+    async def close_sessions(cls):
+        for pool in cls.pools.values():
+            for state in pool.states:
+                if state.session is not None:
+                    await state.session.close()
+
+        cls.pools.clear()
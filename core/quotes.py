@@ -0,0 +1,346 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from core.const import CHAINS_DATA
+from core.multicall import Multicall
+from core.registry import get_client
+from core.scanner import get_eth_balances
+from data.config import CLAIM_QUOTE_TTL, SCAN_BATCH_SIZE
+from eth_abi import decode
+from eth_abi.packed import encode_packed
+from hexbytes import HexBytes
+from loguru import logger
+
+DONATE_SELECTOR = '0xd6d754db'
+GAS_COST_SELECTOR = '0x73760a89'
+SEND_FEE_SELECTOR = '0x9baa23e6'
+# запас на газ клейма, как при пополнении
+TXN_FEE_WEI = 4 * 10 ** 13
+
+
+def build_donate_call(allocation: int) -> str:
+    return DONATE_SELECTOR + encode_packed(
+        ['uint256'],
+        [int(allocation)]
+    ).hex()
+
+
+def decode_donate(data: bytes) -> Tuple[int, int]:
+    stable_amount_wei, _, native_amount_wei = decode(
+        ['uint256', 'uint256', 'uint256'],
+        data
+    )
+
+    return stable_amount_wei, native_amount_wei
+
+
+def build_gas_cost_call(chain: str, amount_wei: int) -> str:
+    return GAS_COST_SELECTOR + encode_packed(
+        ['uint256', 'uint256'],
+        [CHAINS_DATA.get(chain).get('chain_0id'), int(amount_wei)]
+    ).hex()
+
+
+def build_extra_bytes(gas_cost: int) -> str:
+    return f'000301002101{hex(gas_cost)[2:].zfill(64)}'
+
+
+def build_send_fee_call(
+        receiver: str,
+        amount_wei: int,
+        extra_bytes: str,
+) -> str:
+    return SEND_FEE_SELECTOR + encode_packed(
+        [
+            'bytes12',
+            'address',
+            'uint256',
+            'bytes32',
+            'bytes32',
+            'bytes',
+            'bytes26'
+        ],
+        [
+            b'\x00' * 12,
+            receiver,
+            int(amount_wei),
+            b'\x00' * 31 + b'\x60',
+            b'\x00' * 31 + b'\x26',
+            HexBytes(extra_bytes),
+            b'\x00' * 26
+        ]
+    ).hex()
+
+
+def decode_uint(data: bytes) -> int:
+    return int(decode(['uint256'], data)[0])
+
+
+class ClaimQuotes:
+    """Донат, extraBytes и комиссия L0 для всех кошельков заранее, пачками
+    через multicall: клейм берет готовые значения, пока они свежие"""
+
+    def __init__(self, ttl: float = 60, batch_size: int = 500):
+        self.ttl = ttl
+        self.batch_size = batch_size
+        # allocation -> ((стейблы, $ETH), время)
+        self.donates: Dict[int, Tuple[Tuple[int, int], float]] = {}
+        # (сеть, получатель, сумма) -> ((extraBytes, комиссия L0), время)
+        self.extra: Dict[
+            Tuple[str, str, int],
+            Tuple[Tuple[HexBytes, int], float]
+        ] = {}
+        # кошелек -> сеть -> сколько $ETH нужно на клейм
+        self.needs: Dict[str, Dict[str, int]] = {}
+        # кошелек -> сеть -> баланс $ETH на момент расчета
+        self.balances: Dict[str, Dict[str, int]] = {}
+        # кошелек -> аллокация, котировки которых обновляются в фоне
+        self.pending: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def is_fresh(self, fetched_at: float) -> bool:
+        return time.monotonic() - fetched_at < self.ttl
+
+    def get_donate(self, allocation: int) -> Optional[Tuple[int, int]]:
+        cached = self.donates.get(int(allocation))
+
+        if cached is None or not self.is_fresh(cached[1]):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return cached[0]
+
+    def get_extra_bytes(
+            self,
+            chain: str,
+            receiver: str,
+            amount_wei: int,
+    ) -> Optional[Tuple[HexBytes, int]]:
+        cached = self.extra.get((chain, receiver, int(amount_wei)))
+
+        if cached is None or not self.is_fresh(cached[1]):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return cached[0]
+
+    async def fetch_donates(self, amounts: List[int]):
+        multicall = Multicall(chain='arbitrum', batch_size=self.batch_size)
+        donate_address = get_client('arbitrum').donate_address
+        results = await multicall.aggregate([
+            (donate_address, build_donate_call(amount))
+            for amount in amounts
+        ])
+
+        fetched_at = time.monotonic()
+        for amount, (success, data) in zip(amounts, results):
+            if success:
+                self.donates[amount] = (decode_donate(data), fetched_at)
+
+    async def fetch_gas_costs(
+            self,
+            keys: List[Tuple[str, int]],
+    ) -> Dict[Tuple[str, int], int]:
+        multicall = Multicall(chain='arbitrum', batch_size=self.batch_size)
+        donate_address = get_client('arbitrum').donate_address
+        results = await multicall.aggregate([
+            (donate_address, build_gas_cost_call(chain, amount))
+            for chain, amount in keys
+        ])
+
+        return {
+            key: decode_uint(data)
+            for key, (success, data) in zip(keys, results)
+            if success
+        }
+
+    async def fetch_send_fees(
+            self,
+            chain: str,
+            wallets: Dict[str, int],
+            gas_costs: Dict[Tuple[str, int], int],
+    ):
+        items = [
+            (wallet, amount, gas_costs[(chain, amount)])
+            for wallet, amount in wallets.items()
+            if (chain, amount) in gas_costs
+        ]
+        multicall = Multicall(chain=chain, batch_size=self.batch_size)
+        claim_target = await get_client(chain).get_claim_target()
+        results = await multicall.aggregate([
+            (
+                claim_target,
+                build_send_fee_call(
+                    wallet,
+                    amount,
+                    build_extra_bytes(gas_cost)
+                )
+            )
+            for wallet, amount, gas_cost in items
+        ])
+
+        fetched_at = time.monotonic()
+        for (wallet, amount, gas_cost), (success, data) in zip(
+                items,
+                results
+        ):
+            if success:
+                self.extra[(chain, wallet, amount)] = (
+                    (
+                        HexBytes(build_extra_bytes(gas_cost)),
+                        decode_uint(data) + gas_cost,
+                    ),
+                    fetched_at,
+                )
+
+    async def get_balances(
+            self,
+            chain: str,
+            wallets: List[str],
+    ) -> Dict[str, int]:
+        return await get_eth_balances(chain, wallets, self.batch_size)
+
+    def get_need(
+            self,
+            chain: str,
+            wallet: str,
+            amount_wei: int,
+    ) -> Optional[int]:
+        donate = self.donates.get(amount_wei)
+        extra = self.extra.get((chain, wallet, amount_wei))
+
+        if donate is None or (chain != 'arbitrum' and extra is None):
+            return None
+
+        l0_fee = extra[0][1] if extra else 0
+
+        return donate[0][1] + l0_fee + TXN_FEE_WEI
+
+    @staticmethod
+    def format_need(need: int, balance: Optional[int]) -> str:
+        text = f'{round(need / 10 ** 18, 6)}'
+
+        if balance is not None:
+            text += (
+                f' (не хватает '
+                f'{round(max(0, need - balance) / 10 ** 18, 6)})'
+            )
+
+        return text
+
+    async def refresh(self, wallets: Dict[str, int], chains: List[str]):
+        amounts = sorted(set(wallets.values()))
+        l0_chains = [chain for chain in chains if chain != 'arbitrum']
+        _, gas_costs = await asyncio.gather(
+            self.fetch_donates(amounts),
+            self.fetch_gas_costs([
+                (chain, amount)
+                for chain in l0_chains
+                for amount in amounts
+            ]),
+        )
+        await asyncio.gather(*[
+            self.fetch_send_fees(chain, wallets, gas_costs)
+            for chain in l0_chains
+        ])
+
+    def done(self, wallet: str):
+        # кошелек больше не клеймит, его котировки не обновляем
+        self.pending.pop(wallet, None)
+
+    async def keep_fresh(self, wallets: Dict[str, int], chains: List[str]):
+        # котировки живут ttl секунд, а клейм по расписанию идет часами:
+        # обновляем их заранее для кошельков, которым еще предстоит клейм
+        if self.ttl <= 0:
+            return
+
+        self.pending = dict(wallets)
+
+        while True:
+            await asyncio.sleep(self.ttl / 2)
+
+            if not self.pending:
+                return
+
+            try:
+                await self.refresh(dict(self.pending), chains)
+                self.refreshes += 1
+            except Exception as e:
+                logger.warning(f'Не удалось обновить котировки клейма: {e}')
+
+    async def precompute(
+            self,
+            wallets: Dict[str, int],
+            chains: List[str],
+    ) -> Dict[str, Dict[str, int]]:
+        if not wallets:
+            return {}
+
+        logger.info(
+            f'Считаю донат и комиссию L0 для {len(wallets)} кошельков...'
+        )
+
+        _, balances = await asyncio.gather(
+            self.refresh(wallets, chains),
+            asyncio.gather(*[
+                self.get_balances(chain, list(wallets))
+                for chain in chains
+            ]),
+        )
+        balances = dict(zip(chains, balances))
+
+        total_shortfall = 0
+        for wallet, amount in wallets.items():
+            needs = {}
+            for chain in chains:
+                need = self.get_need(chain, wallet, amount)
+                if need is not None:
+                    needs[chain] = need
+            self.needs[wallet] = needs
+            self.balances[wallet] = {
+                chain: balances[chain][wallet]
+                for chain in chains
+                if wallet in balances[chain]
+            }
+
+            if not needs:
+                continue
+
+            # минимум, который придется довести до кошелька
+            total_shortfall += min(
+                max(0, need - balances[chain].get(wallet, need))
+                for chain, need in needs.items()
+            )
+            logger.info(
+                f'{wallet} | Нужно $ETH на клейм: ' + ', '.join(
+                    f'{chain.upper()} '
+                    f'{self.format_need(need, balances[chain].get(wallet))}'
+                    for chain, need in needs.items()
+                )
+            )
+
+        logger.info(
+            f'Котировки готовы для '
+            f'{sum(1 for needs in self.needs.values() if needs)}/'
+            f'{len(wallets)} кошельков, пополнить нужно минимум на '
+            f'{round(total_shortfall / 10 ** 18, 6)} $ETH'
+        )
+
+        return self.needs
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'donates': len(self.donates),
+            'extra': len(self.extra),
+        }
+
+
+claim_quotes = ClaimQuotes(ttl=CLAIM_QUOTE_TTL, batch_size=SCAN_BATCH_SIZE)
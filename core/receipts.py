@@ -0,0 +1,173 @@
+import asyncio
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from loguru import logger
+
+
+class ReceiptWatcher:
+    """Один на сеть: следит за новыми блоками и подтверждает все ожидающие
+    транзакции разом, вместо отдельного цикла опроса на каждый кошелек"""
+
+    def __init__(
+            self,
+            chain: str,
+            make_request: Callable[..., Awaitable[Dict]],
+            poll_interval: float = 2,
+            max_block_gap: int = 3,
+            recheck_every: int = 10,
+    ):
+        self.chain = chain
+        self.make_request = make_request
+        self.poll_interval = poll_interval
+        self.max_block_gap = max_block_gap
+        self.recheck_every = recheck_every
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.fresh: Set[str] = set()
+        self.waiters = Counter()
+        self.last_block = None
+        self.head = asyncio.Event()
+        self.block_receipts = True
+        self.task = None
+        self.ticks = 0
+        self.confirmed = 0
+
+    async def wait(self, tx_hash: str, timeout: float = 1200) -> Dict:
+        tx_hash = tx_hash.lower()
+        future = self.pending.get(tx_hash)
+
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.pending[tx_hash] = future
+            self.fresh.add(tx_hash)
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.watch())
+
+        self.waiters[tx_hash] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        finally:
+            self.waiters[tx_hash] -= 1
+
+            # хэш больше никто не ждет - перестаем его проверять
+            if self.waiters[tx_hash] <= 0:
+                del self.waiters[tx_hash]
+                if self.pending.get(tx_hash) is future:
+                    del self.pending[tx_hash]
+                self.fresh.discard(tx_hash)
+
+    async def watch(self):
+        while self.pending:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.debug(f'{self.chain} | Ошибка проверки квитанций: {e}')
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def tick(self):
+        response = await self.make_request('eth_blockNumber', [])
+        block = int(response['result'], 16)
+
+        if block == self.last_block:
+            return
+
+        self.ticks += 1
+        blocks = (
+            list(range(self.last_block + 1, block + 1))
+            if self.last_block is not None else []
+        )
+
+        # новые хэши могли попасть в блок раньше, чем их начали ждать,
+        # поэтому их, как и большой разрыв в блоках, проверяем поштучно;
+        # из двух способов берем тот, где меньше запросов. Ноды пула бывают
+        # на разной высоте, поэтому раз в recheck_every блоков все хэши
+        # перепроверяются поштучно, чтобы не потерять пропущенный
+        if (
+                self.block_receipts
+                and blocks
+                and len(blocks) <= self.max_block_gap
+                and len(blocks) < len(self.pending)
+                and not self.fresh
+                and self.ticks % self.recheck_every
+        ):
+            receipts = await self.get_block_receipts(blocks)
+        else:
+            receipts = None
+
+        if receipts is None:
+            receipts = await self.get_receipts(list(self.pending))
+            self.fresh.clear()
+
+        self.last_block = block
+        self.resolve(receipts)
+
+        self.head.set()
+        self.head = asyncio.Event()
+
+    async def wait_blocks(self, blocks: int):
+        # работает, пока наблюдатель чего-то ждет
+        start = self.last_block
+
+        while start is None or self.last_block < start + blocks:
+            await self.head.wait()
+            if start is None:
+                start = self.last_block
+
+    async def get_block_receipts(
+            self,
+            blocks: List[int],
+    ) -> Optional[List[Dict]]:
+        responses = await asyncio.gather(*[
+            self.make_request('eth_getBlockReceipts', [hex(block)])
+            for block in blocks
+        ])
+
+        receipts = []
+        for response in responses:
+            if 'error' in response:
+                # RPC не поддерживает метод - дальше только поштучно
+                self.block_receipts = False
+                logger.debug(
+                    f'{self.chain} | eth_getBlockReceipts недоступен: '
+                    f'{response.get("error")}'
+                )
+                return None
+            if not isinstance(response.get('result'), list):
+                # нода еще не видит блок - в этот раз проверяем поштучно
+                return None
+            receipts.extend(response['result'])
+
+        return receipts
+
+    async def get_receipts(self, tx_hashes: List[str]) -> List[Dict]:
+        # запросы уходят одним batch через RPCBatch
+        responses = await asyncio.gather(*[
+            self.make_request('eth_getTransactionReceipt', [tx_hash])
+            for tx_hash in tx_hashes
+        ])
+
+        return [
+            response['result'] for response in responses
+            if response.get('result')
+        ]
+
+    def resolve(self, receipts: List[Dict[str, Any]]):
+        for receipt in receipts:
+            future = self.pending.pop(
+                str(receipt.get('transactionHash', '')).lower(),
+                None
+            )
+
+            if future is not None and not future.done():
+                future.set_result(receipt)
+                self.confirmed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending': len(self.pending),
+            'confirmed': self.confirmed,
+            'blocks': self.ticks,
+            'block_receipts': self.block_receipts,
+        }
@@ -0,0 +1,199 @@
+from typing import Dict
+
+from core.accelerator import Accelerator
+from core.cache import ReadCache
+from core.const import CHAINS_DATA, TOKEN_CONTRACT
+from core.database import Database
+from core.fees import FeeOracle
+from core.gas import GasLimits
+from core.nonce import NonceManager
+from core.receipts import ReceiptWatcher
+from core.rpc import RPCProvider
+from core.utils import ABI
+from data.config import (
+    ACCELERATE_AFTER_BLOCKS,
+    ACCELERATE_FEE_BUMP,
+    ACCELERATE_MAX_FEE,
+    FEE_HISTORY_FLUSH_BLOCKS,
+    READ_CACHE_BLOCK_TTL,
+    READ_CACHE_SIZE,
+    RECEIPT_MAX_BLOCK_GAP,
+    RECEIPT_POLL_INTERVAL,
+    RPC_BATCH_SIZE,
+    RPC_BATCH_INTERVAL,
+    RPC_COOLDOWN,
+    RPC_FAILURE_THRESHOLD,
+    RPC_HEDGE_DELAY,
+    RPC_TIMEOUT,
+)
+from web3 import AsyncWeb3
+from web3.middleware import async_geth_poa_middleware
+
+
+class ChainClient:
+    """Общие для всех кошельков провайдер, контракты и адреса одной сети"""
+
+    def __init__(self, chain: str):
+        self.chain = chain
+        self.data = CHAINS_DATA.get(chain)
+        self.chain_id_response = None
+        self.claim_target = None
+        self.nonces: Dict[str, NonceManager] = {}
+        self.read_cache = ReadCache(
+            max_size=READ_CACHE_SIZE,
+            block_ttl=READ_CACHE_BLOCK_TTL,
+        )
+
+        self.provider = AsyncWeb3(RPCProvider(
+            chain=chain,
+            endpoint_uris=self.data.get('rpcs'),
+            timeout=RPC_TIMEOUT,
+            batch_size=RPC_BATCH_SIZE,
+            batch_interval=RPC_BATCH_INTERVAL,
+            hedge_delay=RPC_HEDGE_DELAY,
+            failure_threshold=RPC_FAILURE_THRESHOLD,
+            cooldown=RPC_COOLDOWN,
+        ))
+        self.provider.middleware_onion.inject(
+            async_geth_poa_middleware,
+            layer=0
+        )
+        self.provider.middleware_onion.inject(
+            self.chain_id_middleware,
+            layer=0
+        )
+        self.provider.middleware_onion.inject(
+            self.read_cache_middleware,
+            layer=0
+        )
+
+        self.receipts = ReceiptWatcher(
+            chain=chain,
+            make_request=self.provider.provider.make_request,
+            poll_interval=RECEIPT_POLL_INTERVAL,
+            max_block_gap=RECEIPT_MAX_BLOCK_GAP,
+        )
+
+        self.fees = FeeOracle(
+            chain=chain,
+            make_request=self.provider.provider.make_request,
+            get_block_number=lambda: self.read_cache.get_block_number(
+                self.provider.provider.make_request
+            ),
+            db=Database(),
+            flush_every=FEE_HISTORY_FLUSH_BLOCKS,
+        )
+
+        self.gas_limits = GasLimits(chain=chain, db=Database())
+        self.accelerator = Accelerator(
+            chain=chain,
+            receipts=self.receipts,
+            fees=self.fees,
+            after_blocks=ACCELERATE_AFTER_BLOCKS.get(chain, 10),
+            fee_bump=ACCELERATE_FEE_BUMP,
+            max_fee_wei=int(ACCELERATE_MAX_FEE * 10 ** 18),
+        )
+
+        self.token_address = self.provider.to_checksum_address(
+            TOKEN_CONTRACT
+        )
+        self.token_contract = self.provider.eth.contract(
+            address=self.token_address,
+            abi=ABI.TOKEN,
+        )
+        self.contract_address = self.provider.to_checksum_address(
+            self.data.get('contract_address')
+        )
+        self.claim_contract = self.provider.eth.contract(
+            address=self.contract_address,
+            abi=ABI.CLAIM,
+        )
+        self.donate_address = (
+            self.provider.to_checksum_address(self.data['donate_address'])
+            if self.data.get('donate_address') else None
+        )
+
+    async def chain_id_middleware(self, make_request, w3):
+        # chain_id запрашивается web3 перед каждым eth_call, он не меняется
+        async def middleware(method, params):
+            if method != 'eth_chainId':
+                return await make_request(method, params)
+
+            if self.chain_id_response is None:
+                response = await make_request(method, params)
+                if 'result' not in response:
+                    return response
+                self.chain_id_response = response
+
+            return self.chain_id_response
+
+        return middleware
+
+    async def read_cache_middleware(self, make_request, w3):
+        async def middleware(method, params):
+            if method not in ReadCache.CACHED_METHODS:
+                return await make_request(method, params)
+
+            block = await self.read_cache.get_block_number(make_request)
+            if block is None:
+                return await make_request(method, params)
+
+            return await self.read_cache.get(
+                ReadCache.make_key(self.chain, block, method, params),
+                lambda: make_request(method, params),
+            )
+
+        return middleware
+
+    async def get_claim_target(self) -> str:
+        if self.claim_target is None:
+            self.claim_target = (
+                await self.claim_contract.functions.claimContract().call()
+            )
+
+        return self.claim_target
+
+    def get_nonce_manager(
+            self,
+            wallet: str,
+            db: Database = None,
+    ) -> NonceManager:
+        manager = self.nonces.get(wallet)
+
+        if manager is None:
+            manager = NonceManager(
+                chain=self.chain,
+                wallet=wallet,
+                make_request=self.provider.provider.make_request,
+                receipts=self.receipts,
+                db=db or Database(),
+            )
+            self.nonces[wallet] = manager
+
+        return manager
+
+
+clients: Dict[str, ChainClient] = {}
+
+
+def get_client(chain: str) -> ChainClient:
+    chain = chain.lower()
+    client = clients.get(chain)
+
+    if client is None:
+        client = ChainClient(chain)
+        clients[chain] = client
+
+    return client
+
+
+async def settle_transactions(wallet: str, db: Database) -> int:
+    settled = 0
+
+    for chain in await db.get_sent_chains(wallet):
+        settled += await get_client(chain).get_nonce_manager(
+            wallet,
+            db
+        ).settle()
+
+    return settled
@@ -0,0 +1,436 @@
+import asyncio
+import itertools
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+from core.governor import get_governor, is_throttled
+from eth_utils import to_bytes
+from loguru import logger
+from web3 import AsyncHTTPProvider
+from web3._utils.encoding import FriendlyJsonSerde, Web3JsonEncoder
+from web3.types import RPCEndpoint, RPCResponse
+
+
+# ошибки в теле ответа, за которые узел не отвечает: их вернет любой RPC
+TRANSACTION_ERRORS = [
+    'revert',
+    'insufficient funds',
+    'nonce',
+    'underpriced',
+    'already known',
+    'gas required exceeds',
+    'intrinsic gas',
+    'fee cap',
+    'base fee',
+]
+
+
+class RPCNodeError(Exception):
+    """Узел ответил 200, но с ошибкой JSON-RPC по своей вине"""
+
+    def __init__(self, message: str, raw_response: bytes):
+        super().__init__(message)
+        self.raw_response = raw_response
+
+
+def get_node_error(raw_response: bytes) -> Optional[str]:
+    try:
+        responses = json.loads(raw_response)
+    except ValueError:
+        return 'ответ не JSON'
+
+    if not isinstance(responses, list):
+        responses = [responses]
+
+    for response in responses:
+        error = response.get('error') if isinstance(response, dict) else None
+        if not error:
+            continue
+
+        if not isinstance(error, dict):
+            return str(error)
+
+        message = str(error.get('message', ''))
+        if error.get('code') == 3 or any(
+                marker in message.lower() for marker in TRANSACTION_ERRORS
+        ):
+            continue
+
+        return f'{error.get("code")}: {message}'
+
+    return None
+
+
+class RPCBatch:
+    """Собирает запросы одной сети за короткое окно в один JSON-RPC batch"""
+
+    def __init__(
+            self,
+            provider: 'RPCProvider',
+            max_size: int,
+            interval: float,
+    ):
+        self.provider = provider
+        self.max_size = max_size
+        self.interval = interval
+        self.pending: List[Tuple[int, bytes, asyncio.Future]] = []
+        self.tasks = set()
+        self.flush_handle = None
+        self.counter = itertools.count()
+        self.batches_sent = 0
+        self.requests_sent = 0
+
+    def encode(self, method: RPCEndpoint, params: Any) -> Tuple[int, bytes]:
+        request_id = next(self.counter)
+        encoded = FriendlyJsonSerde().json_encode({
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params or [],
+            "id": request_id,
+        }, cls=Web3JsonEncoder)
+
+        return request_id, to_bytes(text=encoded)
+
+    async def request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((*self.encode(method, params), future))
+
+        if len(self.pending) >= self.max_size:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(
+                self.interval,
+                self.flush
+            )
+
+        return await future
+
+    def flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        pending, self.pending = self.pending, []
+        if pending:
+            task = asyncio.create_task(self.send(pending))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def send(self, pending: List[Tuple[int, bytes, asyncio.Future]]):
+        self.batches_sent += 1
+        self.requests_sent += len(pending)
+
+        try:
+            if len(pending) == 1:
+                raw_response = await self.provider.post(pending[0][1])
+                responses = [json.loads(raw_response)]
+            else:
+                raw_response = await self.provider.post(
+                    b'[' + b','.join(data for _, data, _ in pending) + b']'
+                )
+                responses = json.loads(raw_response)
+
+            if not isinstance(responses, list):
+                raise ValueError(f'RPC не поддерживает batch: {responses}')
+
+        except Exception as e:
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_id = {response.get('id'): response for response in responses}
+
+        for request_id, _, future in pending:
+            if future.done():
+                continue
+
+            response = by_id.get(request_id)
+            if response is None:
+                future.set_exception(
+                    ValueError(f'RPC не вернул ответ на запрос #{request_id}')
+                )
+            else:
+                future.set_result(response)
+
+
+class RPCNode:
+    """Статистика одного RPC: скользящая задержка, доля ошибок, автомат"""
+
+    def __init__(self, url: str, alpha: float = 0.2):
+        self.url = url
+        self.alpha = alpha
+        self.latency = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.failures_in_row = 0
+        self.open_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.open_until
+
+    @property
+    def score(self) -> float:
+        latency = self.latency if self.latency is not None else 0.5
+        return latency * (1 + 10 * self.error_rate)
+
+    def record_latency(self, latency: float):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.alpha * (latency - self.latency)
+
+    def record_success(self, latency: float):
+        self.requests += 1
+        self.failures_in_row = 0
+        self.error_rate *= 1 - self.alpha
+        self.record_latency(latency)
+
+    def record_failure(self, threshold: int, cooldown: float):
+        self.requests += 1
+        self.errors += 1
+        self.failures_in_row += 1
+        self.error_rate += self.alpha * (1 - self.error_rate)
+
+        if self.failures_in_row >= threshold:
+            backoff = 2 ** min(self.failures_in_row - threshold, 5)
+            self.open_until = time.monotonic() + cooldown * backoff
+            logger.warning(
+                f'RPC | {self.url} выведен из ротации на '
+                f'{int(cooldown * backoff)} сек. после '
+                f'{self.failures_in_row} ошибок подряд'
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'latency': round(self.latency, 3) if self.latency else None,
+            'error_rate': round(self.error_rate, 3),
+            'requests': self.requests,
+            'errors': self.errors,
+            'available': self.available,
+        }
+
+
+class RPCPool:
+    """Выбирает самый быстрый живой RPC сети, дублирует медленные запросы"""
+
+    def __init__(
+            self,
+            urls: List[str],
+            timeout: float = 10,
+            hedge_delay: float = 1.5,
+            failure_threshold: int = 3,
+            cooldown: float = 30,
+    ):
+        self.nodes = [RPCNode(url) for url in urls]
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+    def ranked(self) -> List[RPCNode]:
+        available = [node for node in self.nodes if node.available]
+
+        if not available:
+            return sorted(self.nodes, key=lambda node: node.open_until)
+
+        return sorted(available, key=lambda node: node.score)
+
+    async def send(
+            self,
+            node: RPCNode,
+            session: aiohttp.ClientSession,
+            request_data: bytes,
+            headers: Dict[str, str],
+    ) -> bytes:
+        governor = get_governor(node.url)
+        await governor.acquire()
+        start = time.monotonic()
+
+        try:
+            async with session.post(
+                    node.url,
+                    data=request_data,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+            ) as response:
+                response.raise_for_status()
+                raw_response = await response.read()
+
+        except asyncio.CancelledError:
+            # проиграл дублю - учитываем как медленный ответ
+            node.record_latency(time.monotonic() - start)
+            raise
+
+        except Exception as e:
+            if is_throttled(e):
+                governor.on_throttle()
+            node.record_failure(self.failure_threshold, self.cooldown)
+            raise
+
+        error = get_node_error(raw_response)
+        if error:
+            node.record_failure(self.failure_threshold, self.cooldown)
+            raise RPCNodeError(f'{node.url}: {error}', raw_response)
+
+        governor.on_success()
+        node.record_success(time.monotonic() - start)
+        return raw_response
+
+    async def post(
+            self,
+            session: aiohttp.ClientSession,
+            request_data: bytes,
+            headers: Dict[str, str],
+            hedge: bool = True,
+    ) -> bytes:
+        candidates = self.ranked()
+        pending = set()
+        last_error = None
+
+        try:
+            while candidates or pending:
+                if candidates:
+                    pending.add(asyncio.create_task(self.send(
+                        candidates.pop(0),
+                        session,
+                        request_data,
+                        headers,
+                    )))
+
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay if hedge and candidates else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+
+        finally:
+            for task in pending:
+                task.cancel()
+
+        # ошибку JSON-RPC отдаем вызывающему коду, как ее вернул узел
+        if isinstance(last_error, RPCNodeError):
+            return last_error.raw_response
+
+        raise last_error
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [node.stats() for node in self.nodes]
+
+
+class RPCProvider(AsyncHTTPProvider):
+    """HTTP провайдер с одной aiohttp-сессией и пулом RPC на сеть"""
+
+    sessions: Dict[str, aiohttp.ClientSession] = {}
+    batches: Dict[str, RPCBatch] = {}
+    pools: Dict[str, RPCPool] = {}
+
+    def __init__(
+            self,
+            chain: str,
+            endpoint_uris: List[str],
+            timeout: int = 10,
+            connections_limit: int = 100,
+            batch_size: int = 1,
+            batch_interval: float = 0.01,
+            hedge_delay: float = 1.5,
+            failure_threshold: int = 3,
+            cooldown: float = 30,
+    ):
+        super().__init__(endpoint_uri=endpoint_uris[0])
+        self.chain = chain
+        self.endpoint_uris = endpoint_uris
+        self.timeout = timeout
+        self.connections_limit = connections_limit
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.hedge_delay = hedge_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+    def get_session(self) -> aiohttp.ClientSession:
+        session = self.sessions.get(self.chain)
+
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.connections_limit,
+                    keepalive_timeout=60,
+                ),
+            )
+            self.sessions[self.chain] = session
+
+        return session
+
+    def get_batch(self) -> RPCBatch:
+        batch = self.batches.get(self.chain)
+
+        if batch is None:
+            batch = RPCBatch(
+                provider=self,
+                max_size=self.batch_size,
+                interval=self.batch_interval,
+            )
+            self.batches[self.chain] = batch
+
+        return batch
+
+    def get_pool(self) -> RPCPool:
+        pool = self.pools.get(self.chain)
+
+        if pool is None:
+            pool = RPCPool(
+                urls=self.endpoint_uris,
+                timeout=self.timeout,
+                hedge_delay=self.hedge_delay,
+                failure_threshold=self.failure_threshold,
+                cooldown=self.cooldown,
+            )
+            self.pools[self.chain] = pool
+
+        return pool
+
+    async def post(self, request_data: bytes) -> bytes:
+        # отправку транзакции не дублируем, только повторяем на другом RPC
+        return await self.get_pool().post(
+            session=self.get_session(),
+            request_data=request_data,
+            headers=self.get_request_headers(),
+            hedge=b'eth_sendRawTransaction' not in request_data,
+        )
+
+    async def make_request(
+            self,
+            method: RPCEndpoint,
+            params: Any
+    ) -> RPCResponse:
+        if self.batch_size > 1:
+            return await self.get_batch().request(method, params)
+
+        raw_response = await self.post(
+            self.encode_rpc_request(method, params)
+        )
+
+        return self.decode_rpc_response(raw_response)
+
+    @classmethod
+    async def close_sessions(cls):
+        for session in cls.sessions.values():
+            await session.close()
+
+        cls.sessions.clear()
+        cls.batches.clear()
+
+    @classmethod
+    def stats(cls) -> Dict[str, List[Dict[str, Any]]]:
+        return {chain: pool.stats() for chain, pool in cls.pools.items()}
@@ -0,0 +1,125 @@
+import asyncio
+from typing import Dict, List
+
+from core.const import CHAINS_DATA, MULTICALL3_ADDRESS, TOKEN_CONTRACT
+from core.database import Database
+from core.multicall import Multicall
+from eth_abi import decode
+from loguru import logger
+
+SCAN_CHAINS = ['arbitrum', 'optimism', 'base']
+BALANCE_OF_SELECTOR = '0x70a08231'
+IS_CLAIMED_SELECTOR = '0x7a692982'
+GET_ETH_BALANCE_SELECTOR = '0x4d2301cc'
+
+
+async def get_balances(
+        chain: str,
+        wallets: List[str],
+        batch_size: int,
+) -> Dict[str, int]:
+    multicall = Multicall(chain=chain, batch_size=batch_size)
+    results = await multicall.aggregate([
+        (
+            TOKEN_CONTRACT,
+            Multicall.encode_address_call(BALANCE_OF_SELECTOR, wallet)
+        )
+        for wallet in wallets
+    ])
+
+    return {
+        wallet: decode(['uint256'], data)[0]
+        for wallet, (success, data) in zip(wallets, results)
+        if success
+    }
+
+
+async def get_eth_balances(
+        chain: str,
+        wallets: List[str],
+        batch_size: int,
+) -> Dict[str, int]:
+    multicall = Multicall(chain=chain, batch_size=batch_size)
+    results = await multicall.aggregate([
+        (
+            MULTICALL3_ADDRESS,
+            Multicall.encode_address_call(GET_ETH_BALANCE_SELECTOR, wallet)
+        )
+        for wallet in wallets
+    ])
+
+    return {
+        wallet: decode(['uint256'], data)[0]
+        for wallet, (success, data) in zip(wallets, results)
+        if success
+    }
+
+
+async def get_claimed(
+        wallets: List[str],
+        batch_size: int,
+) -> Dict[str, bool]:
+    multicall = Multicall(chain='arbitrum', batch_size=batch_size)
+    donate_address = CHAINS_DATA.get('arbitrum').get('donate_address')
+    results = await multicall.aggregate([
+        (
+            donate_address,
+            Multicall.encode_address_call(IS_CLAIMED_SELECTOR, wallet)
+        )
+        for wallet in wallets
+    ])
+
+    return {
+        wallet: decode(['uint256'], data)[0] > 0
+        for wallet, (success, data) in zip(wallets, results)
+        if success
+    }
+
+
+async def scan_wallets(
+        wallets: List[str],
+        db: Database,
+        batch_size: int = 500,
+):
+    logger.info(
+        f'Сканирую балансы $ZRO и статус клейма '
+        f'для {len(wallets)} кошельков...'
+    )
+
+    # результат прошлого запуска устарел: кошелек, который не удастся
+    # проверить сейчас, будет проверен по одному
+    await db.delete_scan_results(wallets)
+
+    *balances, claimed = await asyncio.gather(
+        *[
+            get_balances(chain, wallets, batch_size)
+            for chain in SCAN_CHAINS
+        ],
+        get_claimed(wallets, batch_size),
+    )
+    balances = dict(zip(SCAN_CHAINS, balances))
+
+    rows = []
+    for wallet in wallets:
+        if wallet not in claimed or any(
+            wallet not in balances[chain] for chain in SCAN_CHAINS
+        ):
+            continue
+
+        zro_chain, zro_balance = next(
+            (
+                (chain, balances[chain][wallet])
+                for chain in SCAN_CHAINS
+                if balances[chain][wallet] > 0
+            ),
+            (None, 0)
+        )
+        rows.append((wallet, zro_chain, zro_balance, claimed[wallet]))
+
+    await db.save_scan_results(rows)
+
+    logger.info(
+        f'Скан завершен: {len(rows)}/{len(wallets)} кошельков, '
+        f'с балансом $ZRO: {sum(1 for row in rows if row[1])}, '
+        f'уже заклеймлено: {sum(1 for row in rows if row[3])}'
+    )
@@ -0,0 +1,98 @@
+import asyncio
+import heapq
+import random
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Tuple
+
+from loguru import logger
+
+
+class DelayPlanner:
+    """Раскидывает старты кошельков по заданному окну времени.
+
+    Окно делится на равные слоты, каждый кошелек стартует в случайный
+    момент своего слота, поэтому задержки не суммируются, а рандом
+    между соседними кошельками сохраняется.
+    """
+
+    def __init__(
+            self,
+            window: int,
+            wallet_duration: int = 0,
+    ):
+        self.window = window
+        self.wallet_duration = wallet_duration
+        self.schedule: List[Tuple[float, int, Any]] = []
+
+    def plan(
+            self,
+            items: List[Any],
+            start_at: float = None,
+    ) -> List[Tuple[float, int, Any]]:
+        start_at = start_at or time.time()
+        slot = self.window / max(len(items), 1)
+        order = random.sample(range(len(items)), len(items))
+
+        self.schedule = sorted(
+            (
+                start_at + slot * position + random.uniform(0, slot),
+                index,
+                items[index],
+            )
+            for position, index in enumerate(order)
+        )
+
+        return self.schedule
+
+    @property
+    def expected_finish(self) -> float:
+        if not self.schedule:
+            return time.time()
+
+        return self.schedule[-1][0] + self.wallet_duration
+
+    def log_schedule(self, labels: Callable[[Any], str] = str):
+        for start_at, index, item in self.schedule:
+            logger.info(
+                f'[{index + 1}/{len(self.schedule)}] {labels(item)} | '
+                f'старт в {self.format_time(start_at)}'
+            )
+
+        logger.info(
+            f'Запланировали {len(self.schedule)} кошельков, '
+            f'ориентировочное завершение: '
+            f'{self.format_time(self.expected_finish)}'
+        )
+
+    async def run(
+            self,
+            job: Callable[[int, Any], Awaitable[Any]],
+    ):
+        heap = list(self.schedule)
+        heapq.heapify(heap)
+        tasks = []
+        indexes = []
+
+        while heap:
+            start_at, index, item = heapq.heappop(heap)
+            delay = start_at - time.time()
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            tasks.append(asyncio.create_task(job(index, item)))
+            indexes.append(index)
+
+        # ошибка одного старта не отменяет остальные
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        for index, result in zip(indexes, results):
+            if isinstance(result, Exception):
+                logger.error(f'[{index + 1}] Ошибка при старте: {result}')
+
+        return results
+
+    @staticmethod
+    def format_time(timestamp: float) -> str:
+        return datetime.fromtimestamp(timestamp).strftime('%d.%m %H:%M:%S')
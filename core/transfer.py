@@ -1,16 +1,18 @@
+import asyncio
 import traceback
 from typing import List
 
-from core.claimer import Claimer
-from core.const import TOKEN_CONTRACT
 from core.exceptions import NotEnoughtNative
-from core.utils import ABI
 from core.w3 import Web3Manager
 from core.withdraw.okx_ import Okx
 from loguru import logger
 
 
 class Transfer(Web3Manager):
+    # лимит газа для трансфера, отправленного до подтверждения клейма:
+    # оценить его нельзя, $ZRO на кошельке еще нет, остаток газа вернется
+    PIPELINED_GAS_LIMIT = 500000
+
     def __init__(
             self,
             chain: str,
@@ -21,21 +23,12 @@ class Transfer(Web3Manager):
         super().__init__(chain=chain, key=key)
         self.proxies = proxies
         self.deposit_address = deposit_address
-        self.token_contract_address = TOKEN_CONTRACT
-        self.token_contract = self.provider.eth.contract(
-                address=self.provider.to_checksum_address(
-                    self.token_contract_address
-                ),
-                abi=ABI.TOKEN,
-            )
+        self.token_contract_address = self.client.token_address
+        self.token_contract = self.client.token_contract
+        self.status = False
 
     async def run(self, status=False):
-        claimer_action = Claimer(
-            key=self.key,
-            chain=self.chain,
-            proxies=self.proxies,
-        )
-        amount_wei = await claimer_action.get_zro_balance()
+        amount_wei = await self.get_zro_balance()
         amount = round(amount_wei / 10 ** 18, 2)
 
         logger.info(
@@ -50,7 +43,7 @@ class Transfer(Web3Manager):
             needed_amount_wei = e.args[0]
             needed_amount = needed_amount_wei / 10 ** 18
 
-            is_withdraw = Okx.run(
+            is_withdraw = await Okx.run(
                 token='ETH',
                 wallet=self.wallet,
                 chain=self.chain,
@@ -66,33 +59,61 @@ class Transfer(Web3Manager):
         finally:
             return status
 
+    async def build_transfer(self, amount_wei: int):
+        data = self.token_contract.encodeABI(
+            fn_name='transfer',
+            args=[
+                self.provider.to_checksum_address(
+                    self.deposit_address
+                ),
+                int(amount_wei)
+            ]
+        )
+
+        return await self.build_tx(
+            data=data,
+            to_address=self.token_contract_address,
+        )
+
+    async def get_pipelined_fee(self) -> int:
+        gas_price = await self.get_gas_price()
+
+        return self.PIPELINED_GAS_LIMIT * gas_price * 2
+
+    async def send_pipelined(self, amount_wei: int):
+        # уходит сразу за клеймом со следующим nonce
+        contract_txn = await self.build_transfer(amount_wei)
+        gas_limit = await self.client.gas_limits.get(contract_txn)
+
+        if gas_limit is None:
+            hex_hash = await self.send_transaction(
+                contract_txn=contract_txn,
+                gas_limit=self.PIPELINED_GAS_LIMIT,
+                gas_boost=1,
+            )
+        else:
+            hex_hash = await self.send_transaction(
+                contract_txn=contract_txn,
+                gas_limit=gas_limit,
+            )
+
+        return hex_hash, contract_txn
+
     async def transfer_tokens(
             self,
             amount_wei: int,
             amount: float,
     ):
         try:
-            data = self.token_contract.encodeABI(
-                fn_name='transfer',
-                args=[
-                    self.provider.to_checksum_address(
-                        self.deposit_address
-                    ),
-                    int(amount_wei)
-                ]
-            )
+            contract_txn = await self.build_transfer(amount_wei)
 
-            contract_txn = self.build_tx(
-                data=data,
-                to_address=self.token_contract_address,
+            gas_price, gas_estimate, native_balance_wei = await asyncio.gather(
+                self.get_gas_price(),
+                self.get_gas_limit(dict(contract_txn)),
+                self.provider.eth.get_balance(self.wallet),
             )
-
-            gas_price = self.provider.eth.gas_price
-            gas_estimate = self.provider.eth.estimate_gas(contract_txn)
             total_gas_cost_wei = gas_price * gas_estimate
 
-            native_balance_wei = self.provider.eth.get_balance(self.wallet)
-
             if native_balance_wei < total_gas_cost_wei:
                 needed_amount_wei = total_gas_cost_wei - native_balance_wei
                 logger.error(
@@ -101,8 +122,9 @@ class Transfer(Web3Manager):
                 )
                 raise NotEnoughtNative(needed_amount_wei)
 
-            status, hash_ = self.sign_message(
-                contract_txn=contract_txn
+            status, hash_ = await self.sign_message(
+                contract_txn=contract_txn,
+                gas_limit=gas_estimate,
             )
 
             if status:
@@ -1,11 +1,14 @@
 import json
+import functools
 import os
 import re
 import sys
 from pathlib import Path
 from typing import List
 
+from core.enums import ClaimStatus
 from eth_account import Account
+from eth_utils import is_address, to_checksum_address
 from loguru import logger
 
 
@@ -51,6 +54,14 @@ async def load_file(filename: str) -> List[str]:
         return [line.strip() for line in file.readlines()]
 
 
+def checksum_deposit_address(address: str) -> str:
+    if not address or not is_address(address):
+        raise ValueError(f'Неверный депозитный адрес: {address}')
+
+    return to_checksum_address(address)
+
+
+@functools.lru_cache(maxsize=None)
 def get_address_wallet(
         private_key: str
 ):
@@ -69,3 +80,25 @@ def get_address_wallet(
 def convert_to_bytes(address: str) -> bytes:
     padded_address = address[2:].rjust(64, '0')
     return bytes.fromhex(padded_address)
+
+
+def log_claim_status(wallet: str, claim_status: ClaimStatus):
+    if claim_status == ClaimStatus.SUCCESS:
+        logger.success(
+            f'{wallet} | Успешно завершили работу с кошельком'
+        )
+
+    elif claim_status == ClaimStatus.WITHOUT_ALLOCATION:
+        logger.warning(
+            f'{wallet} | На кошельке не найдена аллокация'
+        )
+
+    elif claim_status == ClaimStatus.ALREADY_CLAIMED:
+        logger.info(
+            f'{wallet} | Дроп уже был заклеймлен на '
+            f'кошельке, пропускаем...'
+        )
+    else:
+        logger.error(
+            f'{wallet} | Ошибка: неизвестный статус клейма'
+        )
@@ -1,10 +1,11 @@
-import time
+import asyncio
 from typing import Dict, Any
 
 from core.const import CHAINS_DATA
+from core.registry import get_client
 from core.utils import get_address_wallet
+from data.config import ACCELERATE
 from loguru import logger
-from web3 import Web3, exceptions
 
 
 class Web3Manager:
@@ -16,24 +17,29 @@ class Web3Manager:
         self.key = key
         self.wallet = get_address_wallet(self.key)
         self.chain = chain.lower()
-        self.rpc = CHAINS_DATA.get(self.chain).get('rpc')
+        self.rpcs = CHAINS_DATA.get(self.chain).get('rpcs')
         self.explorer = CHAINS_DATA.get(self.chain).get('explorer')
-        self.provider = Web3(Web3.HTTPProvider(self.rpc))
+        self.client = get_client(self.chain)
+        self.provider = self.client.provider
+        self.nonces = self.client.get_nonce_manager(self.wallet)
 
-    def build_tx(
+    async def get_zro_balance(self):
+        balance = await self.client.token_contract.functions.balanceOf(
+            self.wallet
+        ).call()
+
+        return balance
+
+    async def build_tx(
             self,
             value: int = 0,
             data=None,
             to_address: str = None,
     ):
+        # nonce выдается при подписи, см. send_transaction
         contract_txn = {
-            "chainId": self.provider.eth.chain_id,
-            "from": self.provider.to_checksum_address(
-                self.wallet
-            ),
-            "nonce": self.provider.eth.get_transaction_count(
-                self.wallet
-            ),
+            "chainId": await self.provider.eth.chain_id,
+            "from": self.wallet,
         }
 
         if value:
@@ -49,55 +55,86 @@ class Web3Manager:
 
         return contract_txn
 
-    def sign_message(
+    async def sign_message(
             self,
             contract_txn: Dict[str, Any],
             gas_boost: float = 1.5,
+            gas_limit: int = None,
     ):
         try:
-            gas_limit = self.estimate_gas(
-                contract_txn=contract_txn,
-            )
-            contract_txn['gas'] = int(gas_limit * gas_boost)
-
-            self.add_price(
-                chain=self.chain,
+            hex_hash = await self.send_transaction(
                 contract_txn=contract_txn,
+                gas_boost=gas_boost,
+                gas_limit=gas_limit,
             )
 
-            signed_txn = self.provider.eth.account.sign_transaction(
-                contract_txn,
-                self.key
-            )
-            tx_hash = self.provider.eth.send_raw_transaction(
-                signed_txn.rawTransaction
-            )
-            hex_hash = self.provider.to_hex(tx_hash)
-
             logger.info(f'{self.wallet} | Отправил транзакцию, '
                         f'жду включения в блок...')
 
-            status_tx = self.check_transaction_status(
-                tx_hash=hex_hash
+            return await self.wait_transaction(
+                tx_hash=hex_hash,
+                contract_txn=contract_txn,
             )
 
-            return status_tx, hex_hash
-
         except Exception as e:
             logger.error(f'Ошибка при подписи транзакции: {e}')
 
             return False, None
 
-    def add_price(
+    async def send_transaction(
+            self,
+            contract_txn: Dict[str, Any],
+            gas_boost: float = 1.5,
+            gas_limit: int = None,
+    ) -> str:
+        if gas_limit is None:
+            gas_limit, _ = await asyncio.gather(
+                self.get_gas_limit(
+                    contract_txn=dict(contract_txn),
+                ),
+                self.add_price(
+                    chain=self.chain,
+                    contract_txn=contract_txn,
+                ),
+            )
+        else:
+            await self.add_price(chain=self.chain, contract_txn=contract_txn)
+        contract_txn['gas'] = int(gas_limit * gas_boost)
+
+        contract_txn['nonce'] = await self.nonces.reserve()
+
+        # nonce возвращается, только если транзакция не ушла в сеть,
+        # ошибки записи в базу broadcast не пробрасывает
+        try:
+            return await self.broadcast(contract_txn)
+        except Exception:
+            self.nonces.release(contract_txn['nonce'])
+            raise
+
+    async def broadcast(self, contract_txn: Dict[str, Any]) -> str:
+        signed_txn = self.provider.eth.account.sign_transaction(
+            contract_txn,
+            self.key
+        )
+        tx_hash = await self.provider.eth.send_raw_transaction(
+            signed_txn.rawTransaction
+        )
+
+        hex_hash = self.provider.to_hex(tx_hash)
+        self.client.gas_limits.track(hex_hash, contract_txn)
+        await self.nonces.sent(contract_txn['nonce'], hex_hash)
+
+        return hex_hash
+
+    async def add_price(
             self,
             chain: str,
             contract_txn: Dict[str, Any],
     ) -> Dict[str, Any]:
 
-        block = self.provider.eth.get_block('pending')
-        base_fee = block['baseFeePerGas']
-
-        tip = self.provider.eth.max_priority_fee
+        quote = await self.client.fees.quote()
+        base_fee = quote['base_fee']
+        tip = quote['tip']
 
         if chain in ['avalanche', 'arbitrum']:
             tip = base_fee
@@ -111,12 +148,34 @@ class Web3Manager:
 
         return contract_txn
 
-    def estimate_gas(
+    async def get_gas_price(self) -> int:
+        quote = await self.client.fees.quote()
+
+        return quote['gas_price']
+
+    async def get_gas_limit(self, contract_txn: Dict[str, Any]) -> int:
+        # для вызовов с постоянным расходом газа выученный лимит заменяет
+        # запрос к RPC; после ошибки или аномального расхода он сбрасывается
+        # и транзакция снова оценивается
+        learned = await self.client.gas_limits.get(contract_txn)
+
+        if learned is not None and self.client.gas_limits.is_stable(
+                contract_txn
+        ):
+            return learned
+
+        # оценка через RPC заодно проверяет, что транзакция не откатится,
+        # выученный лимит - нижняя граница
+        gas_limit = await self.estimate_gas(contract_txn=contract_txn)
+
+        return max(gas_limit, learned or 0)
+
+    async def estimate_gas(
             self,
             contract_txn: Dict[str, Any],
     ) -> int:
         try:
-            base_gas_limit = self.provider.eth.estimate_gas(
+            base_gas_limit = await self.provider.eth.estimate_gas(
                 contract_txn
             )
             gas_limit = int(base_gas_limit)
@@ -127,46 +186,63 @@ class Web3Manager:
                 f'При расчете GAS LIMIT возникла ошибка: {e}'
             )
 
-    def check_transaction_status(
+    async def check_transaction_status(
             self,
             tx_hash: hash,
             timeout: int = 1200,  # 20 мин
-            poll_interval: int = 10
     ):
-        time.sleep(10)
-        total_wait_time = 0
-
-        while total_wait_time < timeout:
-            try:
-                tx_receipt = self.provider.eth.get_transaction_receipt(tx_hash)
-
-                if tx_receipt is None:
-                    time.sleep(poll_interval)
-                    total_wait_time += poll_interval
-                else:
-                    if tx_receipt["status"] == 1:
-                        return True
-                    elif tx_receipt["status"] == 0:
-                        return False
-                    else:
-                        time.sleep(poll_interval)
-                        total_wait_time += poll_interval
-
-            except exceptions.TransactionNotFound:
-                time.sleep(poll_interval)
-                total_wait_time += poll_interval
-            except ConnectionError as e:
-                raise Exception(
-                    f"ошибка подключения при "
-                    f"проверки статуса транзакции: {e}\n "
+        status, _ = await self.wait_transaction(tx_hash, timeout=timeout)
+
+        return status
+
+    async def wait_transaction(
+            self,
+            tx_hash: str,
+            contract_txn: Dict[str, Any] = None,
+            timeout: int = 1200,  # 20 мин
+    ):
+        # квитанцию ищет общий для сети наблюдатель за блоками, зависшую
+        # транзакцию ускоритель переотправляет с газом выше
+        hashes = [tx_hash]
+
+        async def replace(bumped_txn: Dict[str, Any]) -> str:
+            new_hash = await self.broadcast(bumped_txn)
+            hashes.append(new_hash)
+            return new_hash
+
+        try:
+            if contract_txn is not None and ACCELERATE:
+                tx_receipt, tx_hash = await self.client.accelerator.wait(
+                    contract_txn=contract_txn,
+                    tx_hash=tx_hash,
+                    replace=replace,
+                    timeout=timeout,
                 )
-            except Exception as e:
-                raise Exception(
-                    f"произошла неизвестная ошибка "
-                    f"при проверки статуса транзакции: {e}"
+            else:
+                tx_receipt = await self.client.receipts.wait(
+                    tx_hash,
+                    timeout=timeout
                 )
+        except asyncio.TimeoutError:
+            # транзакция могла выпасть из мемпула, nonce перечитаем из сети
+            self.nonces.reset()
+            self.client.gas_limits.forget(hashes)
+            raise Exception(
+                f"транзакция не была добавлена "
+                f"в блокчейн спустя {timeout} секунд"
+            )
+
+        # из замен с одним nonce в блок попадает только одна
+        self.client.gas_limits.forget([h for h in hashes if h != tx_hash])
 
-        raise Exception(
-            f"транзакция не была добавлена " 
-            f"в блокчейн спустя {timeout} секунд"
+        status = int(tx_receipt["status"], 16) == 1
+        await asyncio.gather(
+            self.nonces.finished(
+                tx_hash,
+                status,
+                nonce=contract_txn.get('nonce') if contract_txn else None,
+            ),
+            self.client.gas_limits.learn(tx_hash, tx_receipt),
         )
+
+        return status, tx_hash
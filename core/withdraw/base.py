@@ -1,15 +1,52 @@
+import functools
+import threading
+
 from ccxt import AuthenticationError
 import ccxt
 from core.exceptions import OkxNetworkDisabled
+from core.governor import get_governor
 from data.config import API_KEY, API_SECRET, API_PASSWORD, API_PROXY
 from loguru import logger
 
+# синхронный клиент ccxt общий на процесс и не потокобезопасен:
+# все обращения к нему идут по очереди
+exchange_lock = threading.RLock()
+
+
+def locked(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with exchange_lock:
+            return method(*args, **kwargs)
+
+    return wrapper
+
 
 class Base:
+    CHAIN_NAMES = {
+        'arbitrum': 'ARBONE',
+        'optimism': 'OPTIMISM',
+        'base': 'Base',
+    }
+    # один клиент биржи на процесс, авторизация проверяется один раз
+    exchanges = {}
+    authorized = set()
+    lock = threading.Lock()
+
     def __init__(self, name: str):
         self.cex_name = name
 
     def get_ccxt(self):
+        with Base.lock:
+            exchange = Base.exchanges.get(self.cex_name)
+
+            if exchange is None:
+                exchange = self.create_ccxt()
+                Base.exchanges[self.cex_name] = exchange
+
+            return exchange
+
+    def create_ccxt(self):
         try:
             if not API_KEY or not API_SECRET:
                 raise Exception(f"Отсутствует api key или "
@@ -34,18 +71,49 @@ class Base:
             exchange_class = getattr(ccxt, self.cex_name)
             exchange = exchange_class(exchange_options)
 
-            return exchange
+            return self.govern(exchange)
 
         except Exception as e:
             raise Exception(e)
 
+    @staticmethod
+    def govern(exchange):
+        # все HTTP-запросы ccxt проходят через ограничитель скорости хоста
+        fetch = exchange.fetch
+
+        def governed_fetch(url, *args, **kwargs):
+            governor = get_governor(url)
+            governor.acquire_sync()
+
+            try:
+                response = fetch(url, *args, **kwargs)
+            except (
+                    ccxt.RateLimitExceeded,
+                    ccxt.DDoSProtection,
+                    ccxt.RequestTimeout,
+            ):
+                governor.on_throttle()
+                raise
+
+            governor.on_success()
+            return response
+
+        exchange.fetch = governed_fetch
+
+        return exchange
+
+    @locked
     def check_auth(self):
+        if self.cex_name in Base.authorized:
+            return
+
         logger.info(
             f'OKX | Тестируем авторизацию...'
         )
 
         try:
             self.get_ccxt().fetch_balance()
+            Base.authorized.add(self.cex_name)
 
             logger.success(
                 f'OKX | Успешная авторизация'
@@ -66,12 +134,7 @@ class Base:
             chain: str,
             available_chains,
     ):
-        prossible_names = {
-            'arbitrum': 'ARBONE',
-            'optimism': 'OPTIMISM',
-            'base': 'Base',
-        }
-        api_chain_name = prossible_names.get(chain)
+        api_chain_name = Base.CHAIN_NAMES.get(chain)
 
         if api_chain_name not in available_chains:
             logger.error(
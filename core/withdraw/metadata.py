@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from loguru import logger
+
+
+class NetworkMetadata:
+    """Сети вывода токенов с биржи: кэш на диске с TTL, устаревший кэш
+    отдается сразу и обновляется в фоне, но не дольше max_age"""
+
+    def __init__(self, path: str, ttl: float = 3600, max_age: float = 21600):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_age = max(max_age, ttl)
+        self.data: Dict[str, Dict[str, Dict]] = None
+        self.updated_at = 0.0
+        self.lock = threading.Lock()
+        self.refreshing = False
+
+    def load(self):
+        self.data = {}
+
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r') as file:
+                cached = json.load(file)
+            self.data = cached['tokens']
+            self.updated_at = cached['updated_at']
+        except Exception as e:
+            logger.warning(f'Не удалось прочитать {self.path}: {e}')
+
+    def save(self):
+        with open(self.path, 'w') as file:
+            json.dump(
+                {'updated_at': self.updated_at, 'tokens': self.data},
+                file
+            )
+
+    def get_age(self) -> float:
+        return time.time() - self.updated_at
+
+    def is_fresh(self) -> bool:
+        return self.get_age() < self.ttl
+
+    def expire(self, min_age: float = 60) -> bool:
+        # следующий запрос перечитает данные с биржи, но не чаще min_age
+        if self.get_age() < min_age:
+            return False
+
+        self.updated_at = 0.0
+        return True
+
+    def refresh(
+            self,
+            tokens: List[str],
+            fetch: Callable[[List[str]], Dict[str, Dict]],
+    ):
+        try:
+            data = fetch(tokens)
+
+            with self.lock:
+                self.data.update(data)
+                self.updated_at = time.time()
+                self.save()
+        finally:
+            self.refreshing = False
+
+    def refresh_in_background(
+            self,
+            fetch: Callable[[List[str]], Dict[str, Dict]],
+    ):
+        if self.refreshing:
+            return
+        self.refreshing = True
+
+        def run():
+            try:
+                self.refresh(list(self.data), fetch)
+            except Exception as e:
+                logger.warning(f'Не удалось обновить {self.path}: {e}')
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get(
+            self,
+            token: str,
+            fetch: Callable[[List[str]], Dict[str, Dict]],
+    ) -> Dict[str, Dict]:
+        with self.lock:
+            if self.data is None:
+                self.load()
+
+            chains = self.data.get(token)
+
+            if chains is not None and self.get_age() < self.max_age:
+                if not self.is_fresh():
+                    self.refresh_in_background(fetch)
+                return chains
+
+        # данных по токену нет или они слишком старые - загружаем сразу
+        self.refresh([*self.data, token], fetch)
+
+        return self.data.get(token, {})
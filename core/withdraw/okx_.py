@@ -1,12 +1,29 @@
+import asyncio
 import random
 import time
 
 from _decimal import Decimal
+
+import ccxt
 from core.exceptions import OkxNetworkDisabled
-from core.withdraw.base import Base
-from data.config import WITHDRAW_DELAY
+from core.registry import get_client
+from core.withdraw.base import Base, locked
+from core.withdraw.metadata import NetworkMetadata
+from core.withdraw.tracker import withdrawals
+from data.config import (
+    OKX_METADATA_MAX_AGE,
+    OKX_METADATA_TTL,
+    WITHDRAW_DELAY,
+    WITHDRAW_TIMEOUT,
+)
 from loguru import logger
 
+okx_metadata = NetworkMetadata(
+    path='okx_networks.json',
+    ttl=OKX_METADATA_TTL,
+    max_age=OKX_METADATA_MAX_AGE,
+)
+
 
 class Okx(Base):
     def __init__(
@@ -27,7 +44,7 @@ class Okx(Base):
         }
 
     @staticmethod
-    def run(
+    async def run(
             token: str,
             wallet: str,
             chain: str,
@@ -39,32 +56,25 @@ class Okx(Base):
                 address=wallet,
                 token=token.upper(),
             )
-            action.check_auth()
-            chains_list = action.get_chains_list()
-
-            selected_chain = action.search_chain(
-                chain=chain,
-                available_chains=chains_list
+            selected_chain = await asyncio.to_thread(
+                action.select_chain,
+                chain
             )
 
             logger.info(
                 f'OKX | Будем выводить в {selected_chain["name"]}'
             )
 
-            action = Okx(
-                address=wallet,
-                token=token.upper(),
-            )
-
-            status = action.withdraw(
+            status = await action.withdraw(
                 amount=amount,
                 selected_chain=selected_chain,
+                chain=chain,
             )
 
             if status:
                 amt_sleep = random.randint(*WITHDRAW_DELAY)
                 logger.info(f'Сплю {amt_sleep} сек. после вывода...')
-                time.sleep(amt_sleep)
+                await asyncio.sleep(amt_sleep)
 
         except OkxNetworkDisabled:
             raise OkxNetworkDisabled
@@ -74,51 +84,60 @@ class Okx(Base):
 
         return status
 
-    def withdraw(
+    def select_chain(self, chain: str):
+        self.check_auth()
+
+        return self.search_chain(
+            chain=chain,
+            available_chains=self.get_chains_list()
+        )
+
+    async def withdraw(
             self,
             selected_chain,
             amount,
+            chain: str,
             status=False,
     ):
-        amount = Decimal(str(amount))
-        withdraw_fee = Decimal(selected_chain['withdrawFee'])
-        amount += withdraw_fee
-        amount = round(amount, 6)
-
         try:
-            min_withdraw = float(selected_chain['withdrawMin'])
+            # пополнение видно по балансу в сети раньше, чем в API биржи
+            target = None
+            if self.token == 'ETH':
+                balance = await get_client(chain).provider.eth.get_balance(
+                    self.address
+                )
+                target = balance + int(amount * 10 ** 18)
 
-            if min_withdraw > amount:
+            try:
+                withdrawal_id = await asyncio.to_thread(
+                    self.submit_checked,
+                    chain=chain,
+                    amount=amount,
+                    selected_chain=selected_chain,
+                )
+            except ccxt.NetworkError as e:
+                # биржа могла принять вывод до обрыва связи: повторять
+                # нельзя, ждем поступления по балансу в сети
+                if target is None:
+                    raise
                 logger.warning(
-                    f'OKX | Минимальная сумма для вывода: '
-                    f'{amount}, меньше чем минимальная сумма '
-                    f': {selected_chain["withdrawMin"]}'
+                    f'{self.address} | Нет ответа OKX на запрос вывода, '
+                    f'жду поступления по балансу: {e}'
                 )
-                amount = round(min_withdraw * random.uniform(1.001, 1.03), 6)
-
-            withdrawal = self.exchange.withdraw(
-                self.token,
-                amount,
-                self.address,
-                params={
-                    "chain": selected_chain['chainId'],
-                    "fee": selected_chain['withdrawFee'],
-                    "pwd": "-",
-                },
-            )
-            withdrawal_id = withdrawal.get('info').get('wdId')
+                withdrawal_id = f'unknown-{self.address}-{time.time()}'
 
             if withdrawal_id:
-                logger.info(
-                    f'{self.address} | Отправил запрос на вывод '
-                    f'{amount} ${self.token}, ID: {withdrawal_id}'
-                )
                 logger.info(
                     f'Ожидаю поступления депозита...'
                 )
 
-                status = self.check_withdraw_status(
-                    id_=withdrawal_id,
+                status = await withdrawals.wait(
+                    exchange=self.exchange,
+                    withdrawal_id=withdrawal_id,
+                    wallet=self.address,
+                    chain=chain,
+                    target=target,
+                    timeout=WITHDRAW_TIMEOUT,
                 )
 
         except Exception as e:
@@ -127,17 +146,93 @@ class Okx(Base):
                 f'{amount} ${self.token}, ошибка: {e}'
             )
 
-        finally:
-            return status
+        return status
+
+    def submit_checked(
+            self,
+            chain: str,
+            amount,
+            address: str = None,
+            selected_chain=None,
+    ):
+        for attempt in range(2):
+            selected_chain = selected_chain or self.select_chain(chain)
+
+            try:
+                return self.submit_withdraw(
+                    selected_chain=selected_chain,
+                    amount=amount,
+                    address=address,
+                )
+            except ccxt.ExchangeError as e:
+                # биржа отклонила вывод - комиссия или доступность сети могли
+                # измениться: перечитываем данные о сетях и пробуем еще раз;
+                # при сетевой ошибке вывод мог пройти, его не повторяем
+                if attempt or not okx_metadata.expire():
+                    raise
+                logger.warning(
+                    f'OKX | Вывод отклонен, обновляю данные о сетях: {e}'
+                )
+                selected_chain = None
+
+    @locked
+    def submit_withdraw(
+            self,
+            selected_chain,
+            amount,
+            address: str = None,
+    ):
+        address = address or self.address
+        amount = Decimal(str(amount))
+        withdraw_fee = Decimal(selected_chain['withdrawFee'])
+        amount += withdraw_fee
+        amount = round(amount, 6)
+
+        min_withdraw = float(selected_chain['withdrawMin'])
+
+        if min_withdraw > amount:
+            logger.warning(
+                f'OKX | Минимальная сумма для вывода: '
+                f'{amount}, меньше чем минимальная сумма '
+                f': {selected_chain["withdrawMin"]}'
+            )
+            amount = round(min_withdraw * random.uniform(1.001, 1.03), 6)
+
+        withdrawal = self.exchange.withdraw(
+            self.token,
+            amount,
+            address,
+            params={
+                "chain": selected_chain['chainId'],
+                "fee": selected_chain['withdrawFee'],
+                "pwd": "-",
+            },
+        )
+        withdrawal_id = withdrawal.get('info').get('wdId')
+
+        if withdrawal_id:
+            logger.info(
+                f'{address} | Отправил запрос на вывод '
+                f'{amount} ${self.token}, ID: {withdrawal_id}'
+            )
+
+        return withdrawal_id
 
     def get_chains_list(self):
+        return okx_metadata.get(self.token, self.fetch_chains)
+
+    @locked
+    def fetch_chains(self, tokens):
         logger.info(f'OKX | Получаю данные о сетях для вывода...')
-        self.exchange.load_markets()
+        self.exchange.load_markets(reload=True)
+
+        return {token: self.parse_chains(token) for token in tokens}
 
+    def parse_chains(self, token):
         chains_info = {}
 
-        if self.token in self.exchange.currencies:
-            currency_info = self.exchange.currencies[self.token]
+        if token in self.exchange.currencies:
+            currency_info = self.exchange.currencies[token]
             networks = currency_info.get('networks', [])
             for network_key, network_info in networks.items():
                 if 'info' in network_info and isinstance(network_info['info'],
@@ -158,6 +253,18 @@ class Okx(Base):
 
         return chains_info
 
+    @staticmethod
+    def prepare(token: str = 'ETH'):
+        # при старте: авторизация и сети из кэша, дальше вывод - один запрос
+        action = Okx(token=token)
+        action.check_auth()
+        action.get_chains_list()
+
+        # ccxt загружает рынки перед первым выводом, делаем это заранее
+        if not action.exchange.markets:
+            okx_metadata.refresh_in_background(action.fetch_chains)
+
+    @locked
     def okx_hoover(
             self
     ) -> None:
@@ -202,43 +309,3 @@ class Okx(Base):
 
         logger.info(f'OKX | Выключил пылесос')
         time.sleep(1)
-
-    def check_withdraw_status(
-            self,
-            id_: int,
-            delay: tuple = (15, 40),
-    ):
-        start_time = time.time()
-
-        while True:
-            try:
-                time.sleep(random.uniform(*delay))
-
-                fetched_withdrawal = self.exchange.fetch_withdrawal(
-                    id=id_
-                )
-                status_str = fetched_withdrawal.get('status')
-
-                if status_str == 'ok':
-                    return True
-
-                elif status_str == 'failed':
-                    return False
-
-                if time.time() - start_time > 1800:
-                    if status_str:
-                        raise Exception(
-                            f"Статус вывода #{id_} не изменился, "
-                            f"после 20 минут ожидания. "
-                            f"Статус: {status_str}"
-                        )
-                    else:
-                        raise Exception(
-                            f"В ответе API отсутствует статус для "
-                            f"вывода #{id_} после 30 минут ожидания"
-                        )
-
-                time.sleep(60)
-
-            except Exception:
-                pass
\ No newline at end of file
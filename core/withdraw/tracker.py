@@ -0,0 +1,157 @@
+import asyncio
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, Optional, Set
+
+from core.scanner import get_eth_balances
+from core.withdraw.base import locked
+from data.config import SCAN_BATCH_SIZE, WITHDRAW_POLL_INTERVAL
+from loguru import logger
+
+
+class WithdrawalTracker:
+    """Ждет выводы с биржи: один запрос истории выводов за интервал на все
+    ожидающие выводы, баланс кошелька в сети - более быстрый сигнал"""
+
+    def __init__(
+            self,
+            poll_interval: float = 20,
+            page_limit: int = 100,
+            max_pages: int = 5,
+    ):
+        self.poll_interval = poll_interval
+        self.page_limit = page_limit
+        self.max_pages = max_pages
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.exchange = None
+        self.task = None
+        self.polls = 0
+        self.resolved = Counter()
+
+    def resolve(self, withdrawal_id: str, status: bool, source: str):
+        entry = self.pending.get(withdrawal_id)
+
+        if entry is None or entry['future'].done():
+            return
+
+        entry['future'].set_result(status)
+        self.resolved[source] += 1
+
+    async def check_balances(self):
+        # сеть -> кошелек -> минимальный баланс после вывода
+        targets: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for entry in self.pending.values():
+            if entry['target'] is not None:
+                targets[entry['chain']][entry['wallet']] = entry['target']
+
+        for chain, wallets in targets.items():
+            balances = await get_eth_balances(
+                chain,
+                list(wallets),
+                batch_size=SCAN_BATCH_SIZE,
+            )
+
+            for withdrawal_id, entry in list(self.pending.items()):
+                if entry['chain'] != chain or entry['target'] is None:
+                    continue
+                if balances.get(entry['wallet'], 0) >= entry['target']:
+                    self.resolve(withdrawal_id, True, 'balance')
+
+    @locked
+    def fetch_statuses(self, ids: Set[str], since: int) -> Dict[str, str]:
+        statuses = {}
+        params = {}
+
+        for _ in range(self.max_pages):
+            page = self.exchange.fetch_withdrawals(
+                since=since,
+                limit=self.page_limit,
+                params=params,
+            )
+
+            for withdrawal in page:
+                if withdrawal['id'] in ids:
+                    statuses[withdrawal['id']] = withdrawal['status']
+
+            if len(page) < self.page_limit or ids <= statuses.keys():
+                break
+
+            # следующая страница - выводы старше самого раннего на этой
+            params = {
+                'until': min(withdrawal['timestamp'] for withdrawal in page)
+            }
+
+        return statuses
+
+    async def check_statuses(self):
+        ids = {
+            withdrawal_id
+            for withdrawal_id, entry in self.pending.items()
+            if not entry['future'].done()
+        }
+        if not ids:
+            return
+
+        since = min(self.pending[i]['submitted_at'] for i in ids) - 60000
+        statuses = await asyncio.to_thread(self.fetch_statuses, ids, since)
+
+        for withdrawal_id, status in statuses.items():
+            if status == 'ok':
+                self.resolve(withdrawal_id, True, 'exchange')
+            elif status in ['failed', 'canceled']:
+                logger.error(
+                    f'{self.pending[withdrawal_id]["wallet"]} | '
+                    f'Вывод #{withdrawal_id} не прошел, статус: {status}'
+                )
+                self.resolve(withdrawal_id, False, 'exchange')
+
+    async def run(self):
+        while self.pending:
+            await asyncio.sleep(self.poll_interval)
+            self.polls += 1
+
+            for check in [self.check_balances, self.check_statuses]:
+                try:
+                    await check()
+                except Exception as e:
+                    logger.warning(f'OKX | Ошибка при проверке выводов: {e}')
+
+    async def wait(
+            self,
+            exchange,
+            withdrawal_id: str,
+            wallet: str,
+            chain: str,
+            target: Optional[int] = None,
+            timeout: float = 1800,
+    ) -> bool:
+        withdrawal_id = str(withdrawal_id)
+        future = asyncio.get_running_loop().create_future()
+        self.exchange = exchange
+        self.pending[withdrawal_id] = {
+            'future': future,
+            'wallet': wallet,
+            'chain': chain,
+            'target': target,
+            'submitted_at': int(time.time() * 1000),
+        }
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.run())
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            logger.error(
+                f'{wallet} | Вывод #{withdrawal_id} не завершился '
+                f'за {timeout} сек.'
+            )
+            return False
+        finally:
+            self.pending.pop(withdrawal_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'polls': self.polls, **self.resolved}
+
+
+withdrawals = WithdrawalTracker(poll_interval=WITHDRAW_POLL_INTERVAL)
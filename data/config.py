@@ -1,6 +1,90 @@
 # ОСНОВНЫЕ
 # доступные сети: ['optimism', 'arbitrum', 'base']
 CHAINS = ['optimism', 'arbitrum', 'base']
+# как выбирать сеть для клейма: 'cheapest' - самая дешевая (L0 + газ + вывод
+# с OKX), 'fastest' - где не нужен вывод с OKX, 'random' - рандомно;
+# сети, которые дороже лучшей не больше чем на CHAIN_POLICY_TOLERANCE
+# (0.1 = 10%), считаются равными и выбираются рандомно
+CHAIN_POLICY = 'cheapest'
+CHAIN_POLICY_TOLERANCE = 0.1
+# сколько кошельков обрабатывать одновременно (1 - по очереди)
+MAX_CONCURRENT_WALLETS = 1
+# сколько кошельков проверять одним multicall-запросом при старте
+SCAN_BATCH_SIZE = 500
+# сколько пруфов загружать из API L0 одновременно перед стартом
+# (python main.py prefetch - только загрузить пруфы в базу и выйти)
+PROOF_PREFETCH_CONCURRENCY = 20
+# донат и комиссия L0 считаются для всех кошельков заранее одним multicall;
+# сколько сек. эти значения считаются свежими (0 - считать при каждом клейме)
+CLAIM_QUOTE_TTL = 60
+# дублировать запрос пруфа через другой прокси, если первый долго не отвечает
+PROOF_HEDGING = False
+PROOF_HEDGE_MAX = 3             # максимум параллельных запросов на один пруф
+PROOF_HEDGE_PERCENTILE = 0.9    # дублировать после p90 обычной задержки
+# сколько RPC-запросов объединять в один batch и сколько ждать добора (сек.),
+# 1 - отправлять каждый запрос отдельно
+RPC_BATCH_SIZE = 50
+RPC_BATCH_INTERVAL = 0.01
+# RPC сетей задаются списком в core/const.py, запрос идет в самый быстрый
+RPC_TIMEOUT = 10            # таймаут одного запроса к RPC (сек.)
+RPC_HEDGE_DELAY = 1.5       # через сколько сек. дублировать запрос в другой RPC
+RPC_FAILURE_THRESHOLD = 3   # после скольких ошибок подряд убирать RPC из ротации
+RPC_COOLDOWN = 30           # на сколько сек. убирать RPC (растет при повторах)
+READ_CACHE_SIZE = 10000     # сколько одинаковых чтений в рамках блока помнить
+READ_CACHE_BLOCK_TTL = 1    # как часто (сек.) обновлять номер текущего блока
+RECEIPT_POLL_INTERVAL = 2   # как часто (сек.) проверять новые блоки на квитанции
+RECEIPT_MAX_BLOCK_GAP = 5   # до скольких новых блоков брать eth_getBlockReceipts
+FEE_HISTORY_FLUSH_BLOCKS = 50  # раз в сколько блоков писать историю газа
+
+# НАСТРОЙКА КОНВЕЙЕРА
+# True - кошельки проходят этапы скан -> аллокация -> пополнение -> клейм ->
+# трансфер через очереди, у каждого этапа свое кол-во воркеров
+PIPELINE = False
+PIPELINE_WORKERS = {
+    'scan': 20,
+    'allocation': 10,
+    'funding': 5,
+    'claim': 10,
+    'transfer': 10,
+}
+PIPELINE_QUEUE_SIZE = 100       # размер очереди перед каждым этапом
+PIPELINE_MAX_IN_FLIGHT = 200    # максимум кошельков в работе одновременно
+
+# УСКОРЕНИЕ ТРАНЗАКЦИЙ
+# если транзакция не попала в блок за N блоков, она переотправляется с тем же
+# nonce и газом выше (в ACCELERATE_FEE_BUMP раз), пока комиссия не упрется
+# в потолок ACCELERATE_MAX_FEE ($ETH за одну транзакцию)
+ACCELERATE = False
+ACCELERATE_AFTER_BLOCKS = {
+    'arbitrum': 40,     # ~10 сек.
+    'base': 5,          # ~10 сек.
+    'optimism': 5,      # ~10 сек.
+}
+ACCELERATE_FEE_BUMP = 1.2
+ACCELERATE_MAX_FEE = 0.0005
+
+# ПОПОЛНЕНИЕ
+# None - пополнять каждый кошелек с OKX перед его клеймом, 'okx' - до старта
+# вывести с OKX на все кошельки сразу, 'disperse' - до старта разослать $ETH
+# с горячего кошелька пачками (одна транзакция на FUNDING_BATCH_SIZE
+# кошельков); клейм начнется после поступления средств
+FUNDING_MODE = None
+FUNDING_HOT_WALLET_KEY = ''     # приватный ключ горячего кошелька
+FUNDING_MARGIN = 1.1            # запас к недостающей сумме
+FUNDING_BATCH_SIZE = 100
+FUNDING_TIMEOUT = 1800          # сколько сек. ждать поступления средств
+
+# НАСТРОЙКА ЛИМИТОВ
+# потолок запросов в секунду на хост, при 429/таймаутах скорость снижается
+# автоматически и потом плавно возвращается к потолку
+RATE_LIMITS = {
+    'arbitrum.blockpi.network': 20,
+    'base.blockpi.network': 20,
+    'optimism.blockpi.network': 20,
+    'www.layerzero.foundation': 10,
+    'www.okx.com': 5,
+}
+RATE_LIMIT_DEFAULT = 10     # для хостов, которых нет в списке
 
 # НАСТРОЙКА OKX
 API_KEY = ''
@@ -8,10 +92,31 @@ API_SECRET = ''
 API_PASSWORD = ''
 # формат: http://login:pass@ip:port, если не используете - оставьте ковычки('') пустыми
 API_PROXY = ''
+# сколько сек. хранить на диске данные о сетях вывода OKX (okx_networks.json),
+# устаревшие данные используются сразу и обновляются в фоне, но старше
+# OKX_METADATA_MAX_AGE - только после успешного обновления
+OKX_METADATA_TTL = 3600
+OKX_METADATA_MAX_AGE = 21600
+# выводы проверяются одним запросом истории выводов раз в N сек.
+# (и по балансу кошелька в сети), сколько сек. ждать вывод
+WITHDRAW_POLL_INTERVAL = 20
+WITHDRAW_TIMEOUT = 1800
 
 
 # НАСТРОЙКА DELAY
 CLAIM_DELAY = [10, 200]     # задержка после клейма
 WITHDRAW_DELAY = [10, 200]  # задержка после вывода
 ACCOUNT_DELAY = [10, 200]   # задержка между кошельками
+# на Arbitrum $ZRO приходят в транзакции клейма, поэтому трансфер можно
+# отправить сразу за ней со следующим nonce, без ожидания и CLAIM_DELAY
+CLAIM_AND_TRANSFER = False
+# клеймить $ZRO сразу на депозитный адрес, без отдельного трансфера;
+# только в сетях, где токены приходят в самой транзакции клейма (в других
+# сетях они приходят через мост LayerZero, биржа может их не зачислить)
+CLAIM_TO_DEPOSIT = False
+CLAIM_TO_DEPOSIT_CHAINS = ['arbitrum']
+# окно в часах, в которое нужно уложить старт всех кошельков (например 6),
+# старты раскидываются рандомно внутри окна вместо ACCOUNT_DELAY, 0 - выкл.
+# (каждый кошелек стартует в свой слот, MAX_CONCURRENT_WALLETS не действует)
+RUN_WINDOW = 0
 
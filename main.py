@@ -1,9 +1,19 @@
+import sys
+
+from core.allocation import prefetch_proofs
 from core.database import Database
+from core.governor import governors
 from core.process import process_wallets, initialize_database
-from core.utils import load_file, setup_logger
+from core.proxy_pool import ProxyPool
+from core.quotes import claim_quotes
+from core.registry import clients
+from core.rpc import RPCProvider
+from core.utils import get_address_wallet, load_file, setup_logger
 import asyncio
 
 from core.withdraw.okx_ import Okx
+from core.withdraw.tracker import withdrawals
+from data.config import API_KEY, API_SECRET, PROOF_PREFETCH_CONCURRENCY
 from loguru import logger
 
 
@@ -36,11 +46,52 @@ async def main():
         deposit_addresses=deposit_addresses
     )
 
-    await process_wallets(
-        db=db,
-        private_keys=keys,
-        proxies=proxies
-    )
+    if 'prefetch' in sys.argv[1:]:
+        try:
+            await prefetch_proofs(
+                wallets=[get_address_wallet(key) for key in keys],
+                proxies=proxies,
+                db=db,
+                concurrency=PROOF_PREFETCH_CONCURRENCY,
+            )
+        finally:
+            await ProxyPool.close_sessions()
+        return
+
+    if API_KEY and API_SECRET:
+        try:
+            await asyncio.to_thread(Okx.prepare)
+        except Exception as e:
+            logger.error(f'OKX | Не удалось подготовить биржу: {e}')
+
+    try:
+        await process_wallets(
+            db=db,
+            private_keys=keys,
+            proxies=proxies
+        )
+    finally:
+        for chain, nodes in RPCProvider.stats().items():
+            for node in nodes:
+                logger.info(f'RPC {chain.upper()} | {node}')
+        for chain, client in clients.items():
+            logger.info(
+                f'RPC {chain.upper()} | кэш чтений: '
+                f'{client.read_cache.stats()}, '
+                f'квитанции: {client.receipts.stats()}, '
+                f'газ: {client.fees.stats()}, '
+                f'лимиты газа: {client.gas_limits.stats()}, '
+                f'ускорение: {client.accelerator.stats()}'
+            )
+            await client.fees.flush()
+        logger.info(f'Котировки клейма | {claim_quotes.stats()}')
+        logger.info(f'Выводы OKX | {withdrawals.stats()}')
+        for governor in governors.values():
+            logger.info(f'Лимиты | {governor.stats()}')
+        for pool in ProxyPool.pools.values():
+            logger.info(f'Прокси | запросы пруфов: {pool.request_stats()}')
+        await RPCProvider.close_sessions()
+        await ProxyPool.close_sessions()
 
     # Пылесос
     okx = Okx(token='ZRO')